@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import tempfile
+from argparse import ArgumentParser
+
+from exonutils.db.model import BaseModel
+from exonutils.db.handlers import DBHandler
+from exonutils.db.backends.sqlite.engine import Engine
+
+
+class Foobar(BaseModel):
+
+    @classmethod
+    def table_name(cls):
+        return 'foobar'
+
+    @classmethod
+    def table_columns(cls):
+        return [
+            ("col1", "VARCHAR(128) NOT NULL", "UNIQUE INDEX"),
+            ("col2", "TEXT"),
+            ("col3", "INTEGER"),
+            ("col4", "BOOLEAN NOT NULL DEFAULT 0"),
+        ]
+
+
+def rows_data(prefix, rows):
+    for i in range(rows):
+        yield {
+            'col1': '%s_%s' % (prefix, i),
+            'col2': 'description %s' % i,
+            'col3': i,
+            'col4': bool(i % 2),
+        }
+
+
+def main():
+    try:
+        pr = ArgumentParser(prog=None)
+        pr.add_argument(
+            '-r', dest='rows', type=int, default=200000,
+            help="rows per load method")
+        pr.add_argument(
+            '-c', dest='chunk', type=int, default=1000,
+            help="insert_many chunk size")
+        pr.add_argument(
+            '-p', dest='profile', default='balanced',
+            help="sqlite profile")
+        args = pr.parse_args()
+
+        path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        open(path, 'a').close()
+
+        dbh = DBHandler(Engine(), {
+            "database": path, "sqlite_profile": args.profile})
+        dbh.init_database([Foobar])
+
+        print("\nLoad throughput (rows/sec):")
+        with dbh.session() as dbs:
+            t = time.perf_counter()
+            Foobar(dbs).insert_many(
+                rows_data('many', args.rows), chunk_size=args.chunk)
+            print("  %-12s %14.0f" % (
+                "insert_many", args.rows / (time.perf_counter() - t)))
+
+            stats = Foobar(dbs).bulk_load(rows_data('bulk', args.rows))
+            print("  %-12s %14.0f" % ("bulk_load", stats['rows_per_sec']))
+        print()
+
+        dbh.close()
+        for ext in ['', '-wal', '-shm']:
+            if os.path.exists(path + ext):
+                os.remove(path + ext)
+
+    except Exception as e:
+        print("\nError!! %s\n" % e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n-- terminated --")
+
+
+if __name__ == '__main__':
+    main()
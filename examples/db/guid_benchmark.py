@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import tempfile
+from argparse import ArgumentParser
+
+from exonutils.db.model import BaseModel
+from exonutils.db.handlers import DBHandler
+from exonutils.db.common import generate_guid, generate_ordered_guid, \
+    generate_ordered_guids
+from exonutils.db.backends.sqlite.engine import Engine
+
+
+class RandomGuids(BaseModel):
+
+    @classmethod
+    def table_name(cls):
+        return 'foobar'
+
+    @classmethod
+    def table_columns(cls):
+        return [
+            ("col1", "VARCHAR(128) NOT NULL"),
+            ("col2", "INTEGER"),
+        ]
+
+
+class OrderedGuids(RandomGuids):
+
+    @classmethod
+    def guid_generator(cls):
+        return generate_ordered_guids
+
+
+def run_generate(count):
+    result = []
+    for fn in [lambda: [generate_guid() for _ in range(count)],
+               lambda: [generate_ordered_guid() for _ in range(count)],
+               lambda: generate_ordered_guids(count)]:
+        t = time.perf_counter()
+        fn()
+        result.append(count / (time.perf_counter() - t))
+    return result
+
+
+# insert rows in rounds, returns rows/sec of each round
+def run_inserts(engine, model, rounds, rows, cache_size):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    open(path, 'a').close()
+
+    dbh = DBHandler(engine, {
+        "database": path,
+        "sqlite_profile": "balanced",
+        "sqlite_pragmas": {"cache_size": -int(cache_size)},
+    })
+    dbh.init_database([model])
+
+    result = []
+    with dbh.session() as dbs:
+        for n in range(rounds):
+            t = time.perf_counter()
+            model(dbs).insert_many(
+                ({'col1': 'row_%s_%s' % (n, i), 'col2': i}
+                 for i in range(rows)),
+                chunk_size=5000)
+            result.append(rows / (time.perf_counter() - t))
+
+    dbh.close()
+    for ext in ['', '-wal', '-shm']:
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+    return result
+
+
+def main():
+    try:
+        pr = ArgumentParser(prog=None)
+        pr.add_argument(
+            '-n', dest='rounds', type=int, default=10,
+            help="insert rounds")
+        pr.add_argument(
+            '-r', dest='rows', type=int, default=100000,
+            help="rows per insert round")
+        pr.add_argument(
+            '-c', dest='cache', type=int, default=2000,
+            help="sqlite page cache size in KiB")
+        args = pr.parse_args()
+
+        print("\nGeneration (guids/sec):")
+        single, ordered, batch = run_generate(args.rows)
+        print("  %-28s %12.0f" % ("generate_guid", single))
+        print("  %-28s %12.0f" % ("generate_ordered_guid", ordered))
+        print("  %-28s %12.0f" % ("generate_ordered_guids", batch))
+
+        engine = Engine()
+        print("\nInsert throughput per round (rows/sec):")
+        print("  %-8s %14s %14s" % ("round", "random", "ordered"))
+        random_ = run_inserts(
+            engine, RandomGuids, args.rounds, args.rows, args.cache)
+        ordered = run_inserts(
+            engine, OrderedGuids, args.rounds, args.rows, args.cache)
+        for i, (r, o) in enumerate(zip(random_, ordered)):
+            print("  %-8s %14.0f %14.0f" % (
+                "%s rows" % ((i + 1) * args.rows), r, o))
+        print()
+
+    except Exception as e:
+        print("\nError!! %s\n" % e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n-- terminated --")
+
+
+if __name__ == '__main__':
+    main()
@@ -26,11 +26,38 @@ DB_OPTIONS = {
     # "connect_timeout": 30,
     # "retries": 10,
     # "retry_delay": 0.5,
+    # "retry_max_delay": 5,
+    # "retry_deadline": 0,
+    # "retry_jitter": True,
+    # "circuit_breaker": {"threshold": 5, "reset_timeout": 30},
     # "sql_placeholder": "$?",
+    # "stmt_cache_size": 512,
     # "foreign_keys_constraints": True,
+    # "commit_policy": {"ops": 100, "interval": 500},
+    # "stmt_stats": {
+    #     "enabled": True, "size": 1000, "samples": 1024,
+    #     "slow_threshold": 0,
+    # },
+    # "result_cache": {"size": 1024, "ttl": 60, "default": True},
+    # "async_workers": 4,
+    # "pool": {
+    #     "size": 5, "overflow": 8, "timeout": 10,
+    #     "recycle": 1800, "idle_timeout": 300, "pre_ping": True,
+    # },
+    # "replicas": {
+    #     "targets": [{"database": "/tmp/replica1.db", "readonly": True}],
+    #     "routing": "least_outstanding", "eject_timeout": 30,
+    #     "max_eject_timeout": 300,
+    # },
 
     # -- sqlite args --
     # "isolation_level": None,
+    # "sqlite_profile": "balanced",
+    # "sqlite_pragmas": {},
+    # "sqlite_writer": {
+    #     "enabled": True, "readers": 4, "batch_size": 100,
+    #     "batch_delay": 0, "txn_timeout": 30,
+    # },
 }
 
 
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import timeit
+import tempfile
+import sqlite3
+from datetime import datetime, date, time
+from argparse import ArgumentParser
+
+from exonutils.db.backends.sqlite.adapters import datetime_converter, \
+    datetime_adapter, date_adapter, time_adapter
+
+
+# previous converter implementation for comparison
+def legacy_datetime_converter(value):
+    if not value:
+        return None
+
+    value = str(value.decode()).strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S",
+                "%Y-%m-%d", "%H:%M:%S.%f", "%H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt)
+        except Exception:
+            pass
+
+    return value
+
+
+SAMPLES = {
+    'DATETIME': datetime_adapter(
+        datetime(2024, 2, 3, 4, 5, 6, 123456)).encode(),
+    'DATETIME (no usec)': b'2024-02-03 04:05:06',
+    'DATE': date_adapter(date(2024, 2, 3)).encode(),
+    'TIME': time_adapter(time(4, 5, 6, 123456)).encode(),
+}
+
+
+def bench_converters(number):
+    print("\nConverter calls (%s per run, best of 5):" % number)
+    print("  %-20s %12s %12s %8s" % ("format", "legacy", "fast", "gain"))
+    for name, value in SAMPLES.items():
+        t_old = min(timeit.repeat(
+            lambda: legacy_datetime_converter(value),
+            number=number, repeat=5))
+        t_new = min(timeit.repeat(
+            lambda: datetime_converter(value),
+            number=number, repeat=5))
+        print("  %-20s %10.3f s %10.3f s %7.1fx" % (
+            name, t_old, t_new, t_old / t_new))
+
+
+def bench_reads(rows):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE t (c1 DATETIME, c2 DATE, c3 TIME)")
+    conn.executemany(
+        "INSERT INTO t VALUES (?, ?, ?)",
+        [(datetime_adapter(datetime(2024, 1, 1, 0, 0, i % 60, i)),
+          date_adapter(date(2024, 1, 1 + i % 28)),
+          time_adapter(time(0, 0, i % 60, i)))
+         for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+    print("\nSQLite table read (%s rows x 3 columns):" % rows)
+    for name, fn in [('legacy', legacy_datetime_converter),
+                     ('fast', datetime_converter)]:
+        for n in ["DATETIME", "DATE", "TIME"]:
+            sqlite3.register_converter(n, fn)
+        conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+        t = min(timeit.repeat(
+            lambda: conn.execute("SELECT * FROM t").fetchall(),
+            number=1, repeat=3))
+        conn.close()
+        print("  %-8s %8.3f s  (%.0f rows/s)" % (name, t, rows / t))
+
+    os.remove(path)
+
+
+def main():
+    try:
+        pr = ArgumentParser(prog=None)
+        pr.add_argument(
+            '-n', dest='number', type=int, default=100000,
+            help="converter calls per run")
+        pr.add_argument(
+            '-r', dest='rows', type=int, default=100000,
+            help="rows for table read benchmark")
+        args = pr.parse_args()
+
+        bench_converters(args.number)
+        bench_reads(args.rows)
+        print()
+
+    except Exception as e:
+        print("\nError!! %s\n" % e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n-- terminated --")
+
+
+if __name__ == '__main__':
+    main()
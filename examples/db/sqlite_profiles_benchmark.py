@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import tempfile
+from argparse import ArgumentParser
+
+from exonutils.db.model import BaseModel
+from exonutils.db.handlers import DBHandler
+from exonutils.db.backends.sqlite.engine import Engine
+
+PROFILES = [None, 'durable', 'balanced', 'throughput']
+
+
+class Foobar(BaseModel):
+
+    @classmethod
+    def table_name(cls):
+        return 'foobar'
+
+    @classmethod
+    def table_columns(cls):
+        return [
+            ("col1", "VARCHAR(128) NOT NULL", "UNIQUE INDEX"),
+            ("col2", "TEXT"),
+            ("col3", "INTEGER"),
+            ("col4", "BOOLEAN NOT NULL DEFAULT 0"),
+        ]
+
+
+def run_profile(engine, profile, rows, batch):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    open(path, 'a').close()
+
+    options = {"database": path}
+    if profile:
+        options["sqlite_profile"] = profile
+
+    dbh = DBHandler(engine, options)
+    dbh.init_database([Foobar])
+
+    result = []
+    with dbh.session() as dbs:
+        # single row inserts, each commits
+        t = time.perf_counter()
+        for i in range(rows):
+            Foobar(dbs).insert({
+                'col1': 'single_%s' % i,
+                'col2': 'description %s' % i,
+                'col3': i,
+            })
+        result.append(rows / (time.perf_counter() - t))
+
+        # bulk inserts, commit per chunk
+        t = time.perf_counter()
+        Foobar(dbs).insert_many(
+            ({'col1': 'bulk_%s' % i,
+              'col2': 'description %s' % i,
+              'col3': i} for i in range(rows * 10)),
+            chunk_size=batch)
+        result.append(rows * 10 / (time.perf_counter() - t))
+
+    dbh.close()
+    for ext in ['', '-wal', '-shm']:
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+    return result
+
+
+def main():
+    try:
+        pr = ArgumentParser(prog=None)
+        pr.add_argument(
+            '-r', dest='rows', type=int, default=2000,
+            help="single row inserts per profile")
+        pr.add_argument(
+            '-b', dest='batch', type=int, default=100,
+            help="bulk insert chunk size")
+        args = pr.parse_args()
+
+        engine = Engine()
+
+        print("\nWrite throughput (rows/sec):")
+        print("  %-12s %14s %14s" % ("profile", "single-row", "bulk"))
+        for profile in PROFILES:
+            single, bulk = run_profile(
+                engine, profile, args.rows, args.batch)
+            print("  %-12s %14.0f %14.0f" % (
+                profile or 'default', single, bulk))
+        print()
+
+    except Exception as e:
+        print("\nError!! %s\n" % e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n-- terminated --")
+
+
+if __name__ == '__main__':
+    main()
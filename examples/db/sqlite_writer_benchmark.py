@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import tempfile
+import threading
+from argparse import ArgumentParser
+
+from exonutils.db.model import BaseModel
+from exonutils.db.handlers import DBHandler
+from exonutils.db.backends.sqlite.engine import Engine
+
+
+class Foobar(BaseModel):
+
+    @classmethod
+    def table_name(cls):
+        return 'foobar'
+
+    @classmethod
+    def table_columns(cls):
+        return [
+            ("col1", "VARCHAR(128) NOT NULL", "UNIQUE INDEX"),
+            ("col2", "TEXT"),
+            ("col3", "INTEGER"),
+        ]
+
+
+def worker(dbh, n, rows, errors):
+    try:
+        with dbh.session() as dbs:
+            for i in range(rows):
+                Foobar(dbs).insert({
+                    'col1': 'foo_%s_%s' % (n, i),
+                    'col2': 'description %s' % i,
+                    'col3': i,
+                })
+                Foobar(dbs).filterby('col3', i).count()
+    except Exception as e:
+        errors.append(e)
+
+
+def run_mode(engine, profile, writer, threads, rows):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    open(path, 'a').close()
+
+    options = {
+        "database": path,
+        "sqlite_profile": profile,
+        "pool": {"size": threads},
+    }
+    if writer:
+        options["sqlite_writer"] = {"enabled": True}
+
+    dbh = DBHandler(engine, options)
+    dbh.init_database([Foobar])
+
+    errors = []
+    workers = [threading.Thread(target=worker, args=(dbh, n, rows, errors))
+               for n in range(threads)]
+
+    t = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    result = threads * rows / (time.perf_counter() - t)
+
+    dbh.close()
+    for ext in ['', '-wal', '-shm']:
+        if os.path.exists(path + ext):
+            os.remove(path + ext)
+
+    return result, len(errors)
+
+
+def main():
+    try:
+        pr = ArgumentParser(prog=None)
+        pr.add_argument(
+            '-t', dest='threads', type=int, default=8,
+            help="number of worker threads")
+        pr.add_argument(
+            '-r', dest='rows', type=int, default=500,
+            help="insert and read operations per thread")
+        pr.add_argument(
+            '-p', dest='profile', default='durable',
+            choices=sorted(Engine.PROFILES),
+            help="sqlite performance profile")
+        args = pr.parse_args()
+
+        engine = Engine()
+
+        print("\nThreaded insert+read throughput (%s threads, %s):"
+              % (args.threads, args.profile))
+        print("  %-14s %14s %8s" % ("mode", "ops/sec", "errors"))
+        for name, writer in [('shared', False), ('single-writer', True)]:
+            ops, errors = run_mode(
+                engine, args.profile, writer, args.threads, args.rows)
+            print("  %-14s %14.0f %8s" % (name, ops, errors))
+        print()
+
+    except Exception as e:
+        print("\nError!! %s\n" % e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n-- terminated --")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+
+from .session import Session
+from .query import Query
+
+__all__ = []
+
+
+# asyncio session, runs blocking session operations on handler
+# bounded executor. operations of same session are serialized
+class AsyncSession(object):
+
+    def __init__(self, dbh):
+        # sqlite connections are used from executor threads
+        if dbh.engine.backend == 'sqlite' and \
+                dbh.options.get('check_same_thread', True):
+            raise ValueError(
+                "async session for sqlite requires connections pool "
+                "or check_same_thread=False")
+
+        self.dbh = dbh
+
+        # blocking session handler
+        self.session = Session(dbh)
+
+        # created on first use within running loop
+        self._lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # shorthand to create async query instance
+    def __call__(self, model, **kwargs):
+        return AsyncQuery(self, model, **kwargs)
+
+    def query(self, model, **kwargs):
+        return AsyncQuery(self, model, **kwargs)
+
+    def is_connected(self):
+        return self.session.is_connected()
+
+    def in_transaction(self):
+        return self.session.in_transaction()
+
+    def result_columns(self):
+        return self.session.result_columns()
+
+    def rowsaffected(self):
+        return self.session.rowsaffected()
+
+    async def connect(self):
+        await self.run(self.session.connect)
+
+    async def close(self):
+        await self.run(self.session.close)
+
+    async def begin(self):
+        await self.run(self.session.begin)
+
+    async def commit(self):
+        await self.run(self.session.commit)
+
+    async def rollback(self):
+        await self.run(self.session.rollback)
+
+    async def execute(self, sql, params=None, native=False):
+        await self.run(
+            self.session.execute, sql, params=params, native=native)
+
+    async def fetchall(self, sql, params=None, native=False,
+                       rowmode='dict', converters=None,
+                       batch_converters=None):
+        return await self.run(
+            self.session.fetchall, sql, params=params, native=native,
+            rowmode=rowmode, converters=converters,
+            batch_converters=batch_converters)
+
+    # async generator yielding result rows in batches, the session
+    # can't be used for other statements till iteration ends
+    def fetchbatches(self, sql, params=None, batch_size=1000,
+                     native=False, rowmode='dict', converters=None,
+                     batch_converters=None):
+        return self.iterate(self.session.fetchbatches(
+            sql, params=params, batch_size=batch_size, native=native,
+            rowmode=rowmode, converters=converters,
+            batch_converters=batch_converters))
+
+    # run blocking function on handler executor
+    async def run(self, func, *args, **kwargs):
+        if not self._lock:
+            self._lock = asyncio.Lock()
+
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            return await loop.run_in_executor(
+                self.dbh.executor(),
+                functools.partial(func, *args, **kwargs))
+
+    # iterate blocking generator on handler executor
+    async def iterate(self, gen):
+        try:
+            while True:
+                item = await self.run(next, gen, StopIteration)
+                if item is StopIteration:
+                    break
+                yield item
+        finally:
+            await self.run(gen.close)
+
+
+# asyncio query, same fluent api as Query with awaitable operations
+class AsyncQuery(object):
+
+    def __init__(self, adbs, model, **kwargs):
+        self.adbs = adbs
+        self.model = model
+
+        # blocking query handler
+        self.query = Query(adbs.session, model, **kwargs)
+        self.table_name = self.query.table_name
+
+    # iterate all elements using default batch size
+    def __aiter__(self):
+        return self.iter()
+
+    def columns(self, *columns):
+        self.query.columns(*columns)
+        return self
+
+    def filter(self, expr, *params):
+        self.query.filter(expr, *params)
+        return self
+
+    def filterby(self, column, value):
+        self.query.filterby(column, value)
+        return self
+
+    def groupby(self, *groupby):
+        self.query.groupby(*groupby)
+        return self
+
+    def orderby(self, *orderby):
+        self.query.orderby(*orderby)
+        return self
+
+    def having(self, expr, param):
+        self.query.having(expr, param)
+        return self
+
+    def limit(self, limit):
+        self.query.limit(limit)
+        return self
+
+    def offset(self, offset):
+        self.query.offset(offset)
+        return self
+
+    def rowmode(self, mode):
+        self.query.rowmode(mode)
+        return self
+
+    def cache(self, enabled=True, ttl=None):
+        self.query.cache(enabled=enabled, ttl=ttl)
+        return self
+
+    def primary(self):
+        self.query.primary()
+        return self
+
+    async def all(self):
+        return await self.adbs.run(self.query.all)
+
+    # async generator streaming elements from db in batches, each
+    # batch is fetched in one executor call and rows are yielded
+    # within event loop
+    async def iter(self, batch_size=1000):
+        qry = self.query
+        batches = self.adbs.fetchbatches(
+            qry._select_sql(), params=qry._execargs,
+            batch_size=batch_size, native=True, rowmode=qry._rowmode,
+            converters=self.model.data_converters(),
+            batch_converters=self.model.data_batch_converters())
+        try:
+            async for rows in batches:
+                for data in rows:
+                    yield data
+        finally:
+            # release streaming cursor on early exit
+            await batches.aclose()
+
+    async def export(self, target, fmt='csv', compress=False,
+                     batch_size=1000):
+        return await self.adbs.run(
+            self.query.export, target, fmt=fmt, compress=compress,
+            batch_size=batch_size)
+
+    async def page(self, size, cursor=None):
+        return await self.adbs.run(self.query.page, size, cursor=cursor)
+
+    async def first(self):
+        return await self.adbs.run(self.query.first)
+
+    async def one(self):
+        return await self.adbs.run(self.query.one)
+
+    async def get(self, guid):
+        return await self.adbs.run(self.query.get, guid)
+
+    async def count(self):
+        return await self.adbs.run(self.query.count)
+
+    async def sum(self, column):
+        return await self.adbs.run(self.query.sum, column)
+
+    async def min(self, column):
+        return await self.adbs.run(self.query.min, column)
+
+    async def max(self, column):
+        return await self.adbs.run(self.query.max, column)
+
+    async def avg(self, column):
+        return await self.adbs.run(self.query.avg, column)
+
+    async def exists(self):
+        return await self.adbs.run(self.query.exists)
+
+    async def insert(self, data):
+        return await self.adbs.run(self.query.insert, data)
+
+    async def insert_many(self, data_list, chunk_size=500):
+        return await self.adbs.run(
+            self.query.insert_many, data_list, chunk_size=chunk_size)
+
+    async def upsert(self, data, key='guid'):
+        return await self.adbs.run(self.query.upsert, data, key=key)
+
+    async def upsert_many(self, data_list, key='guid', chunk_size=500):
+        return await self.adbs.run(
+            self.query.upsert_many, data_list, key=key,
+            chunk_size=chunk_size)
+
+    async def update(self, data):
+        return await self.adbs.run(self.query.update, data)
+
+    async def delete(self):
+        return await self.adbs.run(self.query.delete)
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import re
 try:
     import pymssql as pysql
 except ImportError:
@@ -9,6 +10,9 @@ from exonutils.db.common import sql_identifier
 
 __all__ = []
 
+_PLAN_OBJECT = re.compile(r'OBJECT:\(([^)]*)\)')
+_PLAN_NAME = re.compile(r'\[([^\]]+)\]')
+
 
 class Engine(BaseEngine):
 
@@ -16,6 +20,9 @@ class Engine(BaseEngine):
 
     sql_placeholder = '%s'
 
+    max_params = 2100
+    max_insert_rows = 1000
+
     Error = pysql.Error
     InterfaceError = pysql.InterfaceError
     DatabaseError = pysql.DatabaseError
@@ -38,7 +45,6 @@ class Engine(BaseEngine):
             user=options['username'],
             password=options['password'],
             charset='utf8',
-            as_dict=True,
             login_timeout=options.get('connect_timeout') or 30,
             timeout=options.get('connect_timeout') or 30)
 
@@ -47,6 +53,76 @@ class Engine(BaseEngine):
     def post_connect(self, conn, options):
         pass
 
+    # pymssql cursors read results lazily from the server stream
+    def stream_cursor(self, conn, batch_size):
+        return conn.cursor()
+
+    def classify_error(self, err):
+        code = err.args[0] if err.args else None
+        if code == 1205:
+            return 'deadlock'
+        if code == 1222:
+            return 'busy'
+        if code == 3960:
+            return 'serialization'
+        if code in (20003, 20006, 20009, 20047):
+            return 'connection'
+        if isinstance(err, pysql.InterfaceError):
+            return 'connection'
+        return None
+
+    def explain(self, conn, sql, params=None, analyze=False):
+        if analyze:
+            raise ValueError("explain analyze not supported for mssql")
+
+        lines = []
+        cur = conn.cursor()
+        try:
+            cur.execute('SET SHOWPLAN_TEXT ON')
+            try:
+                # first result set holds statement text, next ones
+                # hold plan operators
+                cur.execute(sql, tuple(params or ()) or None)
+                while True:
+                    if cur.description:
+                        lines.extend(r[0] for r in cur.fetchall())
+                    if not cur.nextset():
+                        break
+            finally:
+                cur.execute('SET SHOWPLAN_TEXT OFF')
+        finally:
+            cur.close()
+
+        nodes = []
+        for line in lines:
+            if '|--' not in line:
+                continue
+            detail = line.split('|--', 1)[1].strip()
+            op = detail.split('(', 1)[0].strip()
+
+            table, index = None, None
+            m = _PLAN_OBJECT.search(detail)
+            if m:
+                names = _PLAN_NAME.findall(m.group(1))
+                if 'Index' in op and len(names) >= 4:
+                    table, index = names[-2], names[-1]
+                elif names:
+                    table = names[-1]
+
+            nodes.append({
+                'detail': detail,
+                'table': table,
+                'index': index,
+                'full_scan': op in (
+                    'Table Scan', 'Clustered Index Scan', 'Index Scan'),
+                'temp_sort': 'Sort' in op,
+                'raw': line,
+            })
+        return self.query_plan(nodes)
+
+    def tables_sql(self):
+        return "SELECT name FROM sys.tables;"
+
     def table_schema(self, model, **kwargs):
         # tblargs = model.table_args()
 
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
+import tempfile
 try:
     import MySQLdb as pysql
 except ImportError:
     raise RuntimeError("backend package `mysqlclient` not installed")
-from MySQLdb.cursors import DictCursor
+from MySQLdb.cursors import SSCursor
 
 from exonutils.db.engine import BaseEngine
 from exonutils.db.common import sql_identifier
@@ -17,6 +18,9 @@ class Engine(BaseEngine):
 
     sql_placeholder = '%s'
 
+    max_params = 65535
+    max_insert_rows = 1000
+
     Error = pysql.Error
     InterfaceError = pysql.InterfaceError
     DatabaseError = pysql.DatabaseError
@@ -40,7 +44,7 @@ class Engine(BaseEngine):
             password=options['password'],
             charset='utf8mb4',
             use_unicode=True,
-            cursorclass=DictCursor,
+            local_infile=1 if options.get('local_infile') else 0,
             connect_timeout=options.get('connect_timeout') or 30)
 
         return conn
@@ -49,6 +53,94 @@ class Engine(BaseEngine):
         if options.get('foreign_keys_constraints', True):
             conn.cursor().execute('SET foreign_key_checks=1')
 
+    # use unbuffered server side cursor for streaming
+    def stream_cursor(self, conn, batch_size):
+        return conn.cursor(SSCursor)
+
+    def classify_error(self, err):
+        code = err.args[0] if err.args else None
+        if code == 1213:
+            return 'deadlock'
+        if code == 1205:
+            return 'busy'
+        if code in (2002, 2003, 2006, 2013, 2055, 4031):
+            return 'connection'
+        if isinstance(err, pysql.InterfaceError):
+            return 'connection'
+        return None
+
+    def explain(self, conn, sql, params=None, analyze=False):
+        if analyze:
+            raise ValueError("explain analyze not supported for mysql")
+
+        cur = conn.cursor()
+        try:
+            cur.execute('EXPLAIN %s' % sql, tuple(params or ()) or None)
+            columns = [c[0] for c in cur.description]
+            rows = [dict(zip(columns, r)) for r in cur.fetchall()]
+        finally:
+            cur.close()
+
+        nodes = []
+        for row in rows:
+            extra = row.get('Extra') or ''
+            nodes.append({
+                'detail': "%s on %s (%s)" % (
+                    row.get('type'), row.get('table'), extra),
+                'table': row.get('table'),
+                'index': row.get('key'),
+                # ALL is full table scan, index is full index scan
+                'full_scan': row.get('type') in ('ALL', 'index'),
+                'temp_sort': 'Using filesort' in extra or
+                'Using temporary' in extra,
+                'raw': row,
+            })
+        return self.query_plan(nodes)
+
+    # load rows chunks spooled to temp file with LOAD DATA LOCAL
+    # INFILE, requires local_infile option enabled on client and
+    # server side
+    def bulk_load(self, conn, options, table, columns, rows,
+                  chunk_size=10000):
+        if not options.get('local_infile'):
+            raise NotImplementedError()
+
+        sql = ("LOAD DATA LOCAL INFILE %%s INTO TABLE %s "
+               "CHARACTER SET utf8mb4 (%s)") % (
+            sql_identifier(table),
+            ", ".join([sql_identifier(c) for c in columns]))
+
+        count = 0
+        cur = conn.cursor()
+        try:
+            with tempfile.NamedTemporaryFile(
+                    'w', encoding='utf-8', newline='\n',
+                    suffix='.tsv') as f:
+                chunk = 0
+                for row in rows:
+                    f.write(self.bulk_line(row))
+                    chunk += 1
+                    if chunk >= chunk_size:
+                        count += self._load_file(cur, sql, f)
+                        chunk = 0
+                if chunk:
+                    count += self._load_file(cur, sql, f)
+            return count
+        finally:
+            cur.close()
+
+    def _load_file(self, cur, sql, f):
+        f.flush()
+        cur.execute(sql, (f.name,))
+        f.seek(0)
+        f.truncate()
+        return cur.rowcount
+
+    def tables_sql(self):
+        return (
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_schema = DATABASE();")
+
     def table_schema(self, model, **kwargs):
         # tblargs = model.table_args()
 
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import json
+import uuid
 try:
     import psycopg2 as pysql
 except ImportError:
@@ -10,12 +12,49 @@ from exonutils.db.common import sql_identifier
 __all__ = []
 
 
+# file-like reader of bulk load text lines for COPY FROM STDIN,
+# lines are read from iterator on demand
+class _CopyReader(object):
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = ''
+
+    def read(self, size=-1):
+        data, length = [self._buffer], len(self._buffer)
+        if size < 0 or length < size:
+            for line in self._lines:
+                data.append(line)
+                length += len(line)
+                if size >= 0 and length >= size:
+                    break
+
+        data = ''.join(data)
+        if size < 0:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+    def readline(self, size=-1):
+        if self._buffer:
+            line, self._buffer = self._buffer, ''
+            return line
+        return next(self._lines, '')
+
+
 class Engine(BaseEngine):
 
     backend = "pgsql"
 
     sql_placeholder = '%s'
 
+    max_params = 65535
+    max_insert_rows = 1000
+
+    # any error aborts the whole transaction
+    busy_aborts_transaction = True
+
     Error = pysql.Error
     InterfaceError = pysql.InterfaceError
     DatabaseError = pysql.DatabaseError
@@ -45,6 +84,91 @@ class Engine(BaseEngine):
     def post_connect(self, conn, options):
         pass
 
+    # use server side named cursor for streaming
+    def stream_cursor(self, conn, batch_size):
+        cur = conn.cursor(name="cur_%s" % uuid.uuid4().hex)
+        cur.itersize = batch_size
+        return cur
+
+    def classify_error(self, err):
+        code = getattr(err, 'pgcode', None) or ''
+        if code == '40001':
+            return 'serialization'
+        if code == '40P01':
+            return 'deadlock'
+        if code == '55P03':
+            return 'busy'
+        if code.startswith('08') or code in ('57P01', '57P02', '57P03'):
+            return 'connection'
+        # connection failures are raised without error code
+        if not code and isinstance(
+                err, (pysql.OperationalError, pysql.InterfaceError)):
+            return 'connection'
+        return None
+
+    def explain(self, conn, sql, params=None, analyze=False):
+        opts = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+
+        cur = conn.cursor()
+        try:
+            cur.execute('EXPLAIN (%s) %s' % (opts, sql),
+                        tuple(params or ()))
+            plan = cur.fetchone()[0]
+        finally:
+            cur.close()
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        nodes = []
+        stack = [plan[0]['Plan']]
+        while stack:
+            node = stack.pop()
+            stack.extend(reversed(node.get('Plans', [])))
+
+            ntype = node.get('Node Type', '')
+            detail = ntype
+            if node.get('Relation Name'):
+                detail += " on %s" % node['Relation Name']
+            if node.get('Sort Method'):
+                detail += " (%s)" % node['Sort Method']
+            nodes.append({
+                'detail': detail,
+                'table': node.get('Relation Name'),
+                'index': node.get('Index Name'),
+                'full_scan': ntype == 'Seq Scan',
+                'temp_sort': ntype in ('Sort', 'Incremental Sort'),
+                'raw': node,
+            })
+        return self.query_plan(nodes)
+
+    # stream rows as text format to COPY FROM STDIN
+    def bulk_load(self, conn, options, table, columns, rows,
+                  chunk_size=10000):
+        sql = "COPY %s (%s) FROM STDIN" % (
+            sql_identifier(table),
+            ", ".join([sql_identifier(c) for c in columns]))
+
+        cur = conn.cursor()
+        try:
+            cur.copy_expert(
+                sql, _CopyReader(self.bulk_line(r) for r in rows),
+                size=65536)
+            return cur.rowcount
+        finally:
+            cur.close()
+
+    # bytea values in hex format
+    def bulk_value(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return '\\\\x' + bytes(value).hex()
+        return super(Engine, self).bulk_value(value)
+
+    def tables_sql(self):
+        return (
+            "SELECT tablename FROM pg_catalog.pg_tables "
+            "WHERE schemaname = ANY (current_schemas(false));")
+
     def table_schema(self, model, **kwargs):
         # tblargs = model.table_args()
 
@@ -35,16 +35,42 @@ def time_adapter(value):
     return None
 
 
+# base date for time only values, same as strptime default
+_TIME_BASE = date(1900, 1, 1)
+
+
 def datetime_converter(value):
     if not value:
         return None
 
     value = str(value.decode()).strip()
+
+    # fast path, dispatch on length and shape of the formats written by
+    # adapters and parse with fromisoformat
+    n = len(value)
+    try:
+        if n == 26 or n == 19:
+            # YYYY-MM-DD HH:MM:SS[.ffffff]
+            if value[10] == ' ' and (n == 19 or value[19] == '.'):
+                return datetime.fromisoformat(value)
+        elif n == 10:
+            # YYYY-MM-DD
+            if value[4] == '-' and value[7] == '-':
+                return datetime.fromisoformat(value)
+        elif n == 15 or n == 8:
+            # HH:MM:SS[.ffffff]
+            if value[2] == ':' and (n == 8 or value[8] == '.'):
+                return datetime.combine(
+                    _TIME_BASE, time.fromisoformat(value))
+    except ValueError:
+        pass
+
+    # slow path for other formats
     for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S",
                 "%Y-%m-%d", "%H:%M:%S.%f", "%H:%M:%S"):
         try:
             return datetime.strptime(value, fmt)
-        except:
+        except ValueError:
             pass
 
     return value
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
+import re
+import pathlib
 import sqlite3 as pysql
 from exonutils.db.engine import BaseEngine
 from exonutils.db.common import sql_identifier
@@ -8,6 +10,10 @@ from .adapters import register_adapters
 
 __all__ = []
 
+_PLAN_NODE = re.compile(
+    r'^(SCAN|SEARCH) (?:TABLE )?(\S+)(?:.* USING (?:COVERING )?'
+    r'(?:INDEX (\S+)|(PRIMARY KEY|INTEGER PRIMARY KEY)))?')
+
 
 class Engine(BaseEngine):
 
@@ -15,6 +21,10 @@ class Engine(BaseEngine):
 
     sql_placeholder = '?'
 
+    # variables limit raised from 999 to 32766 in sqlite 3.32
+    max_params = 32766 if pysql.sqlite_version_info >= (3, 32, 0) else 999
+    max_insert_rows = 10000
+
     Error = pysql.Error
     InterfaceError = pysql.InterfaceError
     DatabaseError = pysql.DatabaseError
@@ -25,6 +35,35 @@ class Engine(BaseEngine):
     ProgrammingError = pysql.ProgrammingError
     NotSupportedError = pysql.NotSupportedError
 
+    # connection performance profiles, applied as pragmas on connect
+    PROFILES = {
+        # full fsync on each commit, safe on power loss
+        'durable': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'mmap_size': 0,
+            'cache_size': -8000,
+            'temp_store': 'DEFAULT',
+        },
+        # WAL fsync on checkpoints only, safe on app crash and may
+        # lose last commits on power loss
+        'balanced': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 268435456,
+            'cache_size': -32000,
+            'temp_store': 'MEMORY',
+        },
+        # no fsync, may lose commits or corrupt db on power loss
+        'throughput': {
+            'journal_mode': 'WAL',
+            'synchronous': 'OFF',
+            'mmap_size': 1073741824,
+            'cache_size': -131072,
+            'temp_store': 'MEMORY',
+        },
+    }
+
     def __init__(self):
         register_adapters()
 
@@ -36,20 +75,114 @@ class Engine(BaseEngine):
         if not os.path.exists(options['database']):
             raise ValueError("database not found %s" % options['database'])
 
+        # read-only connections for single writer access mode
+        database = options['database']
+        if options.get('readonly'):
+            database = '%s?mode=ro' % \
+                pathlib.Path(database).absolute().as_uri()
+
         conn = pysql.connect(
-            options['database'],
+            database,
             timeout=options['connect_timeout'] or 30,
-            check_same_thread=True,
+            check_same_thread=options.get('check_same_thread', True),
             detect_types=pysql.PARSE_DECLTYPES | pysql.PARSE_COLNAMES,
-            isolation_level=options.get('isolation_level'))
-        conn.row_factory = lambda cur, row: {
-            col[0]: row[idx] for idx, col in enumerate(cur.description)}
+            isolation_level=options.get('isolation_level'),
+            uri=bool(options.get('readonly')))
 
         return conn
 
     def post_connect(self, conn, options):
-        if options.get('foreign_keys_constraints', True):
-            conn.cursor().execute('PRAGMA foreign_keys=ON')
+        cur = conn.cursor()
+        try:
+            if options.get('foreign_keys_constraints', True):
+                cur.execute('PRAGMA foreign_keys=ON')
+            for k, v in self.pragmas(options).items():
+                # journal mode can't be changed on read-only connections
+                if k == 'journal_mode' and options.get('readonly'):
+                    continue
+                cur.execute('PRAGMA %s=%s' % (sql_identifier(k), v))
+        finally:
+            cur.close()
+
+    # get connection pragmas from selected profile and overrides
+    def pragmas(self, options):
+        pragmas = {}
+
+        profile = options.get('sqlite_profile')
+        if profile:
+            if profile not in self.PROFILES:
+                raise ValueError("invalid sqlite profile: %s" % profile)
+            pragmas.update(self.PROFILES[profile])
+            pragmas['busy_timeout'] = \
+                int(float(options.get('connect_timeout') or 30) * 1000)
+
+        pragmas.update(options.get('sqlite_pragmas') or {})
+        for k, v in pragmas.items():
+            if not str(v).lstrip('-').isalnum():
+                raise ValueError("invalid pragma value: %s=%s" % (k, v))
+
+        return pragmas
+
+    def classify_error(self, err):
+        if isinstance(err, pysql.OperationalError):
+            # SQLITE_BUSY=5, SQLITE_LOCKED=6
+            code = getattr(err, 'sqlite_errorcode', None)
+            if code is not None:
+                if code & 0xff in (5, 6):
+                    return 'busy'
+            elif 'locked' in str(err) or 'busy' in str(err):
+                return 'busy'
+        return None
+
+    def explain(self, conn, sql, params=None, analyze=False):
+        if analyze:
+            raise ValueError("explain analyze not supported for sqlite")
+
+        cur = conn.cursor()
+        try:
+            cur.execute('EXPLAIN QUERY PLAN %s' % sql, tuple(params or ()))
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+
+        nodes = []
+        for row in rows:
+            detail = row[-1]
+            table, index, full_scan = None, None, False
+            m = _PLAN_NODE.match(detail)
+            if m:
+                table = m.group(2)
+                index = m.group(3) or m.group(4)
+                # SCAN reads all table or index rows
+                full_scan = m.group(1) == 'SCAN'
+            nodes.append({
+                'detail': detail,
+                'table': table,
+                'index': index,
+                'full_scan': full_scan,
+                'temp_sort': detail.startswith('USE TEMP B-TREE'),
+                'raw': tuple(row),
+            })
+        return self.query_plan(nodes)
+
+    # prepared insert statement executed for all rows, rows iterator
+    # is consumed lazily by executemany
+    def bulk_load(self, conn, options, table, columns, rows,
+                  chunk_size=10000):
+        sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+            sql_identifier(table),
+            ", ".join([sql_identifier(c) for c in columns]),
+            ", ".join(['?'] * len(columns)))
+
+        cur = conn.cursor()
+        try:
+            cur.executemany(sql, rows)
+            return cur.rowcount
+        finally:
+            cur.close()
+
+    def tables_sql(self):
+        return "SELECT name FROM sqlite_master WHERE type='table';"
 
     def table_schema(self, model, **kwargs):
         tblargs = model.table_args()
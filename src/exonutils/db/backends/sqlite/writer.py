@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+import re
+import queue
+import threading
+from concurrent.futures import Future
+
+__all__ = []
+
+_READ_STMT = re.compile(r'^\s*(SELECT|WITH|EXPLAIN|VALUES)\b', re.I)
+_WRITE_KEYWORD = re.compile(r'\b(INSERT|UPDATE|DELETE|REPLACE)\b', re.I)
+
+
+# cursor like result of statement executed by writer thread
+class WriterResult(object):
+
+    def __init__(self, rows, rowcount, description):
+        self._rows = rows
+        self._pos = 0
+        self.rowcount = rowcount
+        self.description = description
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def fetchmany(self, size):
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def close(self):
+        self._rows = []
+
+
+# exclusive write transaction handled by writer thread, statements
+# are queued by session and executed in order
+class WriterTransaction(object):
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        return self._submit('stmt', sql, params)
+
+    def commit(self):
+        self.closed = True
+        return self._submit('commit')
+
+    def rollback(self):
+        self.closed = True
+        return self._submit('rollback')
+
+    def _submit(self, kind, sql=None, params=None):
+        future = Future()
+        self._queue.put((kind, sql, params, future))
+        return future
+
+
+# single writer thread for sqlite database, autocommit writes are
+# group committed in batches and transactions are run exclusively
+class SQLiteWriter(object):
+
+    def __init__(self, dbh, batch_size=100, batch_delay=0,
+                 txn_timeout=30):
+        self.dbh = dbh
+        # max statements per group commit
+        self.batch_size = int(batch_size)
+        # seconds to wait for more statements before group commit
+        self.batch_delay = float(batch_delay)
+        # max idle seconds between transaction statements
+        self.txn_timeout = float(txn_timeout)
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._conn = None
+
+    # check if sql statement is read only and can run on readers
+    def is_read(self, sql):
+        if not _READ_STMT.match(sql):
+            return False
+        if sql.lstrip()[:4].upper() == 'WITH' and \
+                _WRITE_KEYWORD.search(sql):
+            return False
+        return True
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self):
+        with self._lock:
+            if self.is_running():
+                return
+
+            ready = Future()
+            self._thread = threading.Thread(
+                target=self._run, args=(ready,),
+                name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+        # wait writer connection
+        ready.result()
+
+    def stop(self):
+        with self._lock:
+            if not self.is_running():
+                return
+            self._queue.put(None)
+            thread = self._thread
+        thread.join()
+
+    # submit autocommit statement, returns future of WriterResult
+    def submit(self, sql, params=None):
+        self.start()
+        future = Future()
+        self._queue.put(('stmt', sql, params, future))
+        return future
+
+    # begin exclusive write transaction
+    def begin(self):
+        self.start()
+        txn = WriterTransaction()
+        self._queue.put(('txn', txn))
+        return txn
+
+    def _run(self, ready):
+        try:
+            self._conn = self.dbh.connection(isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(True)
+
+        try:
+            pending = None
+            while True:
+                job = pending or self._queue.get()
+                pending = None
+                if job is None:
+                    break
+
+                if job[0] == 'txn':
+                    self._run_transaction(job[1])
+                    continue
+
+                # collect autocommit statements for group commit
+                batch = [job]
+                while len(batch) < self.batch_size:
+                    try:
+                        if self.batch_delay > 0:
+                            job = self._queue.get(timeout=self.batch_delay)
+                        else:
+                            job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None or job[0] != 'stmt':
+                        pending = job
+                        break
+                    batch.append(job)
+
+                self._run_batch(batch)
+                if pending is None and job is None:
+                    break
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def _run_batch(self, batch):
+        results = []
+        cur = self._conn.cursor()
+        try:
+            cur.execute('BEGIN IMMEDIATE')
+            for _, sql, params, future in batch:
+                cur.execute('SAVEPOINT stmt')
+                try:
+                    results.append((future, self._execute(sql, params)))
+                    cur.execute('RELEASE stmt')
+                except Exception as e:
+                    cur.execute('ROLLBACK TO stmt')
+                    cur.execute('RELEASE stmt')
+                    results.append((future, e))
+            cur.execute('COMMIT')
+        except Exception as e:
+            try:
+                self._conn.rollback()
+            except Exception:
+                pass
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            cur.close()
+
+        for future, result in results:
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _run_transaction(self, txn):
+        cur = self._conn.cursor()
+        try:
+            cur.execute('BEGIN IMMEDIATE')
+        except Exception as e:
+            cur.close()
+            self._fail_transaction(txn, e)
+            return
+
+        try:
+            while True:
+                try:
+                    kind, sql, params, future = \
+                        txn._queue.get(timeout=self.txn_timeout)
+                except queue.Empty:
+                    self._conn.rollback()
+                    self._fail_transaction(txn, RuntimeError(
+                        "writer transaction timeout"))
+                    return
+
+                if kind == 'commit' or kind == 'rollback':
+                    try:
+                        if kind == 'commit':
+                            cur.execute('COMMIT')
+                        else:
+                            cur.execute('ROLLBACK')
+                        future.set_result(None)
+                    except Exception as e:
+                        self._conn.rollback()
+                        future.set_exception(e)
+                    return
+
+                try:
+                    future.set_result(self._execute(sql, params))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            cur.close()
+
+    # fail transaction pending and future statements
+    def _fail_transaction(self, txn, err):
+        txn.closed = True
+        while True:
+            try:
+                job = txn._queue.get_nowait()
+            except queue.Empty:
+                break
+            job[3].set_exception(err)
+
+        # drain statements queued after failure in background
+        def _drain():
+            while True:
+                try:
+                    kind, _, _, future = txn._queue.get(
+                        timeout=self.txn_timeout)
+                except queue.Empty:
+                    return
+                future.set_exception(err)
+                if kind == 'commit' or kind == 'rollback':
+                    return
+        threading.Thread(target=_drain, daemon=True).start()
+
+    def _execute(self, sql, params):
+        cur = self._conn.cursor()
+        try:
+            if params:
+                cur.execute(sql, tuple(params))
+            else:
+                cur.execute(sql)
+            rows = cur.fetchall() if cur.description else []
+            return WriterResult(rows, cur.rowcount, cur.description)
+        finally:
+            cur.close()
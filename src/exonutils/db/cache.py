@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+from collections import OrderedDict
+
+__all__ = []
+
+
+# thread safe LRU cache for compiled sql statements
+class StatementCache(object):
+
+    def __init__(self, size=512):
+        # max number of cached statements, 0 to disable
+        self.size = int(size)
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    # get cached statement or build and cache new one
+    def get(self, key, builder):
+        if self.size <= 0:
+            return builder()
+
+        with self._lock:
+            sql = self._data.get(key)
+            if sql is not None:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return sql
+            self._misses += 1
+
+        sql = builder()
+
+        with self._lock:
+            self._data[key] = sql
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+        return sql
+
+    # get cache statistics snapshot
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'max_size': self.size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+            }
+
+    # delete all cached statements and reset counters
+    def clear(self):
+        with self._lock:
+            self._data = OrderedDict()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+
+# thread safe LRU cache for query results with TTL expiry and
+# table-level invalidation
+class ResultCache(object):
+
+    def __init__(self, size=1024, ttl=60):
+        # max number of cached results
+        self.size = int(size)
+        # default entries time-to-live in seconds
+        self.ttl = float(ttl)
+
+        # cached entries as key: (expire_ts, table, rows)
+        self._data = OrderedDict()
+        # table name: set of cached keys
+        self._tables = {}
+        # table name: invalidation generation counter
+        self._generations = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+        self._invalidations = 0
+
+    # get table generation, used to skip storing results read
+    # before table invalidation
+    def generation(self, table):
+        with self._lock:
+            return self._generations.get(table, 0)
+
+    # get cached rows or None
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._expired += 1
+                self._misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry[2]
+
+    # cache rows for key if table not invalidated since generation
+    def set(self, key, table, rows, generation=None, ttl=None):
+        ttl = self.ttl if ttl is None else float(ttl)
+        if self.size <= 0 or ttl <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and \
+                    generation != self._generations.get(table, 0):
+                return
+
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, table, rows)
+            if table not in self._tables:
+                self._tables[table] = set()
+            self._tables[table].add(key)
+
+            while len(self._data) > self.size:
+                self._remove(next(iter(self._data)))
+                self._evictions += 1
+
+    # delete all cached results for table
+    def invalidate(self, table):
+        with self._lock:
+            self._generations[table] = \
+                self._generations.get(table, 0) + 1
+            for key in self._tables.pop(table, set()):
+                del(self._data[key])
+            self._invalidations += 1
+
+    # get cache statistics snapshot
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'max_size': self.size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expired': self._expired,
+                'invalidations': self._invalidations,
+            }
+
+    # delete all cached results and reset counters
+    def clear(self):
+        with self._lock:
+            self._data = OrderedDict()
+            self._tables = {}
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._expired = 0
+            self._invalidations = 0
+
+    def _remove(self, key):
+        _, table, _ = self._data.pop(key)
+        keys = self._tables.get(table)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del(self._tables[table])
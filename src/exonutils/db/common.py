@@ -1,16 +1,36 @@
 # -*- coding: utf-8 -*-
+import os
 import re
+import json
+import time
 import uuid
+import base64
+import decimal
+import datetime
+import functools
+import threading
 
 __all__ = []
 
+_SQL_IDENTIFIER = re.compile("^[a-zA-Z0-9_]+$")
+
+# last issued ordered guid tick: 48-bit unix ms and 12-bit sequence
+_ORDERED_TICK = [0]
+_ORDERED_LOCK = threading.Lock()
+
 
 def sql_identifier(name):
-    name = str(name)
+    return _sql_identifier(str(name))
+
+
+# identifiers are validated once and memoized, invalid names
+# raise errors and are never cached
+@functools.lru_cache(maxsize=4096)
+def _sql_identifier(name):
     if not name:
         raise ValueError("invalid empty sql identifier")
 
-    if not re.match("^[a-zA-Z0-9_]+$", name):
+    if not _SQL_IDENTIFIER.match(name):
         raise ValueError("invalid sql identifier [%s]" % name)
 
     return name
@@ -25,3 +45,84 @@ def data_mapping(mapper, data):
 
 def generate_guid():
     return uuid.uuid5(uuid.uuid1(), uuid.uuid4().hex).hex
+
+
+# generate list of random guids
+def generate_guids(count):
+    return [generate_guid() for _ in range(count)]
+
+
+# generate time ordered guid with UUIDv7 layout: 48-bit unix ms
+# timestamp, 12-bit sequence and 62 random bits. guids are increasing
+# within process, sequence overflow advances timestamp
+def generate_ordered_guid():
+    return generate_ordered_guids(1)[0]
+
+
+# generate list of increasing time ordered guids
+def generate_ordered_guids(count):
+    if count <= 0:
+        return []
+
+    with _ORDERED_LOCK:
+        tick = (time.time_ns() // 1000000) << 12
+        if tick > _ORDERED_TICK[0]:
+            # random sequence start in lower half of ms range
+            tick |= int.from_bytes(os.urandom(2), 'big') & 0x7ff
+        else:
+            tick = _ORDERED_TICK[0] + 1
+        _ORDERED_TICK[0] = tick + count - 1
+
+    rand = os.urandom(8 * count)
+    return ['%012x7%03x%016x' % (
+        t >> 12, t & 0xfff,
+        int.from_bytes(rand[i * 8:i * 8 + 8], 'big') >> 2 |
+        0x8000000000000000)
+        for i, t in enumerate(range(tick, tick + count))]
+
+
+# encode list of values into opaque url-safe cursor string
+def encode_cursor(values):
+    def _default(v):
+        if isinstance(v, datetime.datetime):
+            return {'$dt': v.isoformat()}
+        if isinstance(v, datetime.date):
+            return {'$d': v.isoformat()}
+        if isinstance(v, datetime.time):
+            return {'$t': v.isoformat()}
+        if isinstance(v, decimal.Decimal):
+            return {'$dec': str(v)}
+        if isinstance(v, (bytes, bytearray)):
+            return {'$b': base64.b64encode(bytes(v)).decode()}
+        raise ValueError("unsupported cursor value type %s" % type(v))
+
+    data = json.dumps(values, default=_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+# decode opaque cursor string into list of values
+def decode_cursor(cursor):
+    def _hook(d):
+        if len(d) == 1:
+            k, v = next(iter(d.items()))
+            if k == '$dt':
+                return datetime.datetime.fromisoformat(v)
+            if k == '$d':
+                return datetime.date.fromisoformat(v)
+            if k == '$t':
+                return datetime.time.fromisoformat(v)
+            if k == '$dec':
+                return decimal.Decimal(v)
+            if k == '$b':
+                return base64.b64decode(v)
+        return d
+
+    try:
+        data = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data.decode(), object_hook=_hook)
+    except Exception:
+        raise ValueError("invalid cursor")
+    if type(values) is not list:
+        raise ValueError("invalid cursor")
+    return values
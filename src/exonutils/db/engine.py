@@ -2,6 +2,10 @@
 
 __all__ = []
 
+# bulk load text format escapes
+_BULK_ESCAPE = str.maketrans({
+    '\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
 
 class BaseEngine(object):
 
@@ -9,6 +13,13 @@ class BaseEngine(object):
 
     sql_placeholder = '?'
 
+    # max bound params per statement and max rows per multi-row insert
+    max_params = 999
+    max_insert_rows = 1000
+
+    # busy errors abort the whole transaction, not only the statement
+    busy_aborts_transaction = False
+
     Error = Exception
     InterfaceError = Exception
     DatabaseError = Exception
@@ -25,5 +36,70 @@ class BaseEngine(object):
     def post_connect(self, conn, options):
         pass
 
+    # create cursor for streaming large results in batches
+    def stream_cursor(self, conn, batch_size):
+        cur = conn.cursor()
+        cur.arraysize = batch_size
+        return cur
+
+    # classify transient errors for statement retries, returns one of
+    # ['busy', 'deadlock', 'serialization', 'connection'] or None
+    def classify_error(self, err):
+        return None
+
+    # check connection liveness, raise error on dead connection
+    def ping(self, conn):
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT 1")
+            cur.fetchall()
+        finally:
+            cur.close()
+
+    # get normalized query plan of statement, analyze executes the
+    # statement to get actual run stats where supported
+    def explain(self, conn, sql, params=None, analyze=False):
+        raise NotImplementedError()
+
+    # build normalized query plan from plan nodes, nodes are dicts
+    # with keys: detail, table, index, full_scan, temp_sort, raw
+    def query_plan(self, nodes):
+        return {
+            'backend': self.backend,
+            'full_scan': any(n['full_scan'] for n in nodes),
+            'scanned_tables': sorted(set(
+                n['table'] for n in nodes
+                if n['full_scan'] and n['table'])),
+            'temp_sort': any(n['temp_sort'] for n in nodes),
+            'nodes': nodes,
+        }
+
+    # load rows tuples into table using backend native bulk loader,
+    # rows are consumed lazily from iterable and chunk size sets rows
+    # per load statement for chunked loaders. returns loaded rows
+    # count. raise NotImplementedError before reading any rows if
+    # bulk load is not supported
+    def bulk_load(self, conn, options, table, columns, rows,
+                  chunk_size=10000):
+        raise NotImplementedError()
+
+    # format value for tab separated bulk load text
+    def bulk_value(self, value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return '1' if value else '0'
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            raise ValueError("binary values not supported for bulk load")
+        return str(value).translate(_BULK_ESCAPE)
+
+    # format row values as tab separated bulk load text line
+    def bulk_line(self, row):
+        return '\t'.join([self.bulk_value(v) for v in row]) + '\n'
+
+    # get catalog query listing existing tables names
+    def tables_sql(self):
+        raise NotImplementedError()
+
     def table_schema(self, model, **kwargs):
         raise NotImplementedError()
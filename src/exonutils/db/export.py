@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import csv
+import json
+import gzip
+import uuid
+import time
+import base64
+import decimal
+import datetime
+
+__all__ = []
+
+# supported export formats
+FORMATS = ['csv', 'jsonl']
+
+
+# json encoding of values not supported by json module
+def json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date,
+                          datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return value.hex
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode()
+    raise TypeError("value of type %s is not JSON serializable"
+                    % type(value).__name__)
+
+
+# open export target for text writing, target is file path or file
+# like object in text or binary mode. returns text file and closing
+# mode: close, detach or keep
+def open_target(target, compress=False):
+    if isinstance(target, (str, os.PathLike)):
+        if compress:
+            return gzip.open(
+                target, 'wt', encoding='utf-8', newline=''), 'close'
+        return open(target, 'w', encoding='utf-8', newline=''), 'close'
+
+    # closing gzip writer doesn't close wrapped file object
+    if compress:
+        return io.TextIOWrapper(
+            gzip.GzipFile(fileobj=target, mode='wb'),
+            encoding='utf-8', newline=''), 'close'
+    if isinstance(target, io.TextIOBase):
+        return target, 'keep'
+    return io.TextIOWrapper(target, encoding='utf-8', newline=''), 'detach'
+
+
+# write rows batches to target incrementally in csv or jsonl format.
+# csv rows are tuples with header from columns callable called after
+# first batch, jsonl rows are dicts. returns export statistics
+def write_rows(batches, target, fmt='csv', compress=False, columns=None):
+    if fmt not in FORMATS:
+        raise ValueError("invalid export format: %s" % fmt)
+
+    t_start = time.perf_counter()
+    stats = {'rows': 0, 'elapsed': 0.0, 'rows_per_sec': 0.0}
+
+    f, mode = open_target(target, compress=compress)
+    try:
+        if fmt == 'csv':
+            writer = csv.writer(f)
+            for rows in batches:
+                if not stats['rows'] and columns:
+                    writer.writerow(columns())
+                writer.writerows(rows)
+                stats['rows'] += len(rows)
+        else:
+            encode = json.JSONEncoder(
+                default=json_default, ensure_ascii=False,
+                separators=(',', ':')).encode
+            for rows in batches:
+                f.write('\n'.join(map(encode, rows)))
+                f.write('\n')
+                stats['rows'] += len(rows)
+    finally:
+        if mode == 'close':
+            f.close()
+        elif mode == 'detach':
+            f.flush()
+            f.detach()
+        else:
+            f.flush()
+
+    stats['elapsed'] = time.perf_counter() - t_start
+    if stats['elapsed'] > 0:
+        stats['rows_per_sec'] = stats['rows'] / stats['elapsed']
+    return stats
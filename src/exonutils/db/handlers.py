@@ -1,7 +1,17 @@
 # -*- coding: utf-8 -*-
 import copy
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from .session import Session
+from .aio import AsyncSession
+from .pool import ConnectionPool
+from .cache import StatementCache, ResultCache
+from .stats import StatementStats
+from .retry import RetryPolicy, CircuitBreaker
+from .replicas import ReplicaSet, ReplicaRetryPolicy
+from .metadata import SchemaInfo, schema_fingerprint
 
 __all__ = []
 
@@ -23,25 +33,261 @@ class DBHandler(object):
         if not self.options.get("retry_delay"):
             self.options["retry_delay"] = 0.5
 
+        # statements retry policy for transient errors
+        self.retry_policy = RetryPolicy(
+            retries=self.options["retries"],
+            delay=self.options["retry_delay"],
+            max_delay=self.options.get("retry_max_delay", 5),
+            deadline=self.options.get("retry_deadline", 0),
+            jitter=self.options.get("retry_jitter", True))
+
+        # circuit breaker to fail fast while backend is down
+        self.circuit_breaker = None
+        breaker = self.options.get("circuit_breaker") or {}
+        if breaker.get("threshold", 0) > 0:
+            self.circuit_breaker = CircuitBreaker(
+                threshold=breaker['threshold'],
+                reset_timeout=breaker.get('reset_timeout', 30))
+
         # set sql statement placeholder
         if not self.options.get("sql_placeholder"):
             self.options["sql_placeholder"] = "$?"
 
+        # compiled sql statements cache, 0 size to disable
+        self.options.setdefault("stmt_cache_size", 512)
+        self.stmt_cache = StatementCache(
+            size=self.options["stmt_cache_size"])
+
+        # executed statements statistics
+        self.stmt_stats = None
+        stmt_stats = self.options.get("stmt_stats") or {}
+        if stmt_stats.get("enabled", True):
+            self.stmt_stats = StatementStats(
+                size=stmt_stats.get('size', 1000),
+                samples=stmt_stats.get('samples', 1024),
+                slow_threshold=stmt_stats.get('slow_threshold', 0))
+
+        # query results cache, disabled when cache size is 0
+        self.result_cache = None
+        result_cache = self.options.get("result_cache") or {}
+        if result_cache.get("size", 0) > 0:
+            self.result_cache = ResultCache(
+                size=result_cache['size'],
+                ttl=result_cache.get('ttl', 60))
+
+        # sqlite single writer access mode, writes are serialized by
+        # writer thread and reads use pooled read-only connections
+        self.writer = None
+        pool = self.options.get("pool") or {}
+        writer = self.options.get("sqlite_writer") or {}
+        if writer.get("enabled"):
+            if self.engine.backend != 'sqlite':
+                raise ValueError(
+                    "sqlite_writer not supported for %s backend"
+                    % self.engine.backend)
+
+            from .backends.sqlite.writer import SQLiteWriter
+            self.writer = SQLiteWriter(
+                self,
+                batch_size=writer.get('batch_size', 100),
+                batch_delay=writer.get('batch_delay', 0),
+                txn_timeout=writer.get('txn_timeout', 30))
+            if not pool.get("size"):
+                pool = dict(pool, size=writer.get('readers', 4))
+
+        # connections pool, disabled when pool size is 0
+        self.pool = None
+        if pool.get("size", 0) > 0:
+            # pooled connections are handed over between threads
+            self.options.setdefault("check_same_thread", False)
+            self.pool = ConnectionPool(
+                functools.partial(self.connection, readonly=True)
+                if self.writer else self.connection,
+                ping=self.engine.ping if pool.get("pre_ping", True)
+                else None,
+                size=pool['size'],
+                overflow=pool.get('overflow', 8),
+                timeout=pool.get('timeout', 10),
+                recycle=pool.get('recycle', 1800),
+                idle_timeout=pool.get('idle_timeout', 300))
+
+        # async sessions executor, created on first use. workers are
+        # bounded to pool size so executor threads don't wait for
+        # pooled connections
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        if not self.options.get("async_workers"):
+            self.options["async_workers"] = pool.get("size") or 4
+
+        # read replicas, query reads outside write transactions are
+        # routed to replicas handlers using target options overrides
+        self.replicas = None
+        replicas = self.options.get("replicas") or {}
+        if replicas.get("targets"):
+            handlers = []
+            for target in replicas['targets']:
+                options = dict(self.options, **target)
+                for k in ['replicas', 'sqlite_writer', 'result_cache']:
+                    options.pop(k, None)
+                dbh = DBHandler(self.engine, options)
+
+                # replicas share statements cache and stats with primary
+                dbh.stmt_cache = self.stmt_cache
+                dbh.stmt_stats = self.stmt_stats
+                policy = dbh.retry_policy
+                dbh.retry_policy = ReplicaRetryPolicy(
+                    retries=policy.retries, delay=policy.delay,
+                    max_delay=policy.max_delay, deadline=policy.deadline,
+                    jitter=policy.jitter)
+                handlers.append(dbh)
+
+            self.replicas = ReplicaSet(
+                handlers,
+                routing=replicas.get('routing', 'least_outstanding'),
+                eject_timeout=replicas.get('eject_timeout', 30),
+                max_eject_timeout=replicas.get('max_eject_timeout', 300))
+
     # get new session handler
     def session(self):
         return Session(self)
 
-    # create database tables and initialize table data
-    def init_database(self, models, **kwargs):
+    # get new asyncio session handler
+    def async_session(self):
+        return AsyncSession(self)
+
+    # get bounded executor for async sessions
+    def executor(self):
+        with self._executor_lock:
+            if not self._executor:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.options["async_workers"],
+                    thread_name_prefix="dbh-async")
+            return self._executor
+
+    # create new backend connection, kwargs override handler options
+    def connection(self, **kwargs):
+        options = dict(self.options, **kwargs) if kwargs else self.options
+        conn = self.engine.connection(options)
+        try:
+            self.engine.post_connect(conn, options)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    # get connection from pool or create new connection
+    def acquire(self):
+        # writer sets WAL journal mode before readers connect
+        if self.writer:
+            self.writer.start()
+        if self.pool:
+            return self.pool.acquire()
+        return self.connection()
+
+    # return connection to pool or close it
+    def release(self, conn, invalidate=False):
+        if self.pool:
+            self.pool.release(conn, invalidate=invalidate)
+        else:
+            conn.close()
+
+    # get connections pool statistics
+    def pool_stats(self):
+        if self.pool:
+            return self.pool.stats()
+        return {}
+
+    # get read replicas routing statistics
+    def replica_stats(self):
+        if self.replicas:
+            return self.replicas.stats()
+        return []
+
+    # check read replicas health, failed replicas are ejected and
+    # healthy replicas rejoin. returns list of replicas health
+    def check_replicas(self):
+        if self.replicas:
+            return self.replicas.health_check()
+        return []
+
+    # get executed statements statistics per statement shape
+    def statement_stats(self, reset=False):
+        if not self.stmt_stats:
+            return {}
+        return self.stmt_stats.snapshot(reset=reset)
+
+    # get query results cache statistics
+    def result_cache_stats(self):
+        if self.result_cache:
+            return self.result_cache.stats()
+        return {}
+
+    # close all pooled connections, stop writer thread, async
+    # sessions executor and replicas handlers
+    def close(self):
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        if self.pool:
+            self.pool.close()
+        if self.writer:
+            self.writer.stop()
+        if self.replicas:
+            self.replicas.close()
+
+    # create database tables and initialize table data, models with
+    # unchanged schema fingerprint are skipped unless force is set.
+    # returns list of initialized tables names
+    def init_database(self, models, force=False, **kwargs):
+        if not models:
+            return []
+        names = [kwargs.get("table_name") or m.table_name() for m in models]
+
         with self.session() as dbs:
+            # existing tables and stored schema fingerprints
+            tables = set([r[0].lower() for r in dbs.fetchall(
+                self.engine.tables_sql(), rowmode='tuple')])
+            fingerprints = {}
+            if SchemaInfo.table_name() in tables:
+                qry = SchemaInfo(dbs).cache(False).primary().filter(
+                    "table_name IN (%s)" % ", ".join(
+                        [self.options['sql_placeholder']] * len(names)),
+                    *names)
+                for r in qry.all():
+                    fingerprints[r['table_name']] = r['fingerprint']
+            else:
+                dbs.begin()
+                for sql in self.engine.table_schema(SchemaInfo):
+                    dbs.execute(sql)
+                dbs.commit()
+
+            changed = []
+            for model, table in zip(models, names):
+                schema = self.engine.table_schema(model, **kwargs)
+                fingerprint = schema_fingerprint(model, schema)
+                if not force and table.lower() in tables and \
+                        fingerprints.get(table) == fingerprint:
+                    continue
+                changed.append((model, table, schema, fingerprint))
+
+            if not changed:
+                return []
+
             # build database schema
             dbs.begin()
-            for model in models:
-                for sql in self.engine.table_schema(model, **kwargs):
+            for model, _, schema, _ in changed:
+                for sql in schema:
                     dbs.execute(sql)
                 model.upgrade_schema(dbs, **kwargs)
             dbs.commit()
 
-            # initialize models data
-            for model in models:
+            # initialize models data, fingerprints are stored after
+            # data initialization succeeds
+            for model, table, _, fingerprint in changed:
                 model.initialize_data(dbs, **kwargs)
+                SchemaInfo(dbs).upsert(
+                    {'table_name': table, 'fingerprint': fingerprint},
+                    key='table_name')
+
+            return [c[1] for c in changed]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from .model import BaseModel
+
+__all__ = []
+
+
+# stored models schema fingerprints used by init_database to skip
+# unchanged models
+class SchemaInfo(BaseModel):
+
+    @classmethod
+    def table_name(cls):
+        return 'exonutils_schema_info'
+
+    @classmethod
+    def table_columns(cls):
+        return [
+            ("table_name", "VARCHAR(128) NOT NULL", "UNIQUE INDEX"),
+            ("fingerprint", "VARCHAR(64) NOT NULL"),
+        ]
+
+
+# get fingerprint of model schema statements and schema version
+def schema_fingerprint(model, statements):
+    h = hashlib.sha256(str(model.schema_version()).encode())
+    for sql in statements:
+        h.update(b'\0')
+        h.update(sql.encode())
+    return h.hexdigest()
+
+
+# chunked migrations progress, see migrate.ChunkedMigration
+class MigrationInfo(BaseModel):
+
+    @classmethod
+    def table_name(cls):
+        return 'exonutils_migration_info'
+
+    @classmethod
+    def table_columns(cls):
+        return [
+            ("name", "VARCHAR(128) NOT NULL", "UNIQUE INDEX"),
+            # running|done
+            ("status", "VARCHAR(16) NOT NULL"),
+            # keyset cursor of last processed row
+            ("position", "VARCHAR(1024)"),
+            ("rows_done", "BIGINT NOT NULL"),
+            ("chunks_done", "BIGINT NOT NULL"),
+        ]
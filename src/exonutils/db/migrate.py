@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import time
+
+from .metadata import MigrationInfo
+
+__all__ = []
+
+
+# online migration processing table rows in keyset ordered chunks,
+# each chunk is committed with migration progress so interrupted
+# migrations resume after last committed chunk. rows are walked in
+# guid order, process must not change rows guid.
+class ChunkedMigration(object):
+
+    def __init__(self, dbs, name, model, process=None, chunk_size=1000,
+                 throttle=0, **kwargs):
+        self.dbs = dbs
+        # unique migration name
+        self.name = name
+        self.model = model
+        # callable(dbs, rows) processing chunk rows
+        self._process = process
+        # rows per chunk
+        self.chunk_size = int(chunk_size)
+        # seconds to sleep between chunks
+        self.throttle = float(throttle)
+        # model query args, ie. table_name
+        self.kwargs = kwargs
+
+        if self.chunk_size <= 0:
+            raise ValueError("invalid chunk size")
+
+    # get source rows query, override to add filters
+    def query(self):
+        return self.model(self.dbs, **self.kwargs)
+
+    # process chunk rows within chunk transaction
+    def process(self, rows):
+        if not self._process:
+            raise NotImplementedError()
+        self._process(self.dbs, rows)
+
+    # get stored migration progress or None
+    def progress(self):
+        self.dbs.dbh.init_database([MigrationInfo])
+        return MigrationInfo(self.dbs).cache(False).primary() \
+            .filterby('name', self.name).one()
+
+    # delete stored progress to run migration again
+    def reset(self):
+        self.dbs.dbh.init_database([MigrationInfo])
+        MigrationInfo(self.dbs).filterby('name', self.name).delete()
+
+    # run or resume migration, returns run statistics
+    def run(self):
+        if self.dbs.in_transaction():
+            raise RuntimeError("can't run migration within transaction")
+
+        state = self.progress() or {
+            'status': 'running', 'position': None, 'rows_done': 0,
+            'chunks_done': 0}
+        stats = {
+            'name': self.name,
+            'resumed': bool(state['position']),
+            'rows': 0,
+            'chunks': 0,
+            'total_rows': state['rows_done'],
+            'elapsed': 0.0,
+            'rows_per_sec': 0.0,
+            'done': state['status'] == 'done',
+        }
+        if stats['done']:
+            return stats
+
+        t_start = time.perf_counter()
+        cursor = state['position']
+        while True:
+            rows, next_cursor = self.query().orderby('guid ASC') \
+                .cache(False).primary() \
+                .page(self.chunk_size, cursor=cursor)
+
+            self.dbs.begin()
+            try:
+                if rows:
+                    self.process(rows)
+                state['rows_done'] += len(rows)
+                state['chunks_done'] += 1 if rows else 0
+                state['position'] = next_cursor or cursor
+                state['status'] = 'running' if next_cursor else 'done'
+                MigrationInfo(self.dbs).upsert({
+                    'name': self.name,
+                    'status': state['status'],
+                    'position': state['position'],
+                    'rows_done': state['rows_done'],
+                    'chunks_done': state['chunks_done'],
+                }, key='name')
+                self.dbs.commit()
+            except Exception:
+                self.dbs.rollback()
+                raise
+
+            cursor = next_cursor
+            stats['rows'] += len(rows)
+            stats['chunks'] += 1 if rows else 0
+            stats['total_rows'] = state['rows_done']
+            stats['elapsed'] = time.perf_counter() - t_start
+            if stats['elapsed'] > 0:
+                stats['rows_per_sec'] = stats['rows'] / stats['elapsed']
+
+            if self.dbs.dbh.logger:
+                self.dbs.dbh.logger.info(
+                    "(%s) - migration %s: %s rows, %.0f rows/s" % (
+                        self.dbs.dbh.options.get('database'), self.name,
+                        state['rows_done'], stats['rows_per_sec']))
+
+            if not cursor:
+                stats['done'] = True
+                return stats
+
+            if self.throttle > 0:
+                time.sleep(self.throttle)
+
+
+# backfill rows in chunks, transform is callable(row) returning dict
+# of column values to update or None to skip row
+def backfill(dbs, name, model, transform, chunk_size=1000, throttle=0,
+             **kwargs):
+    def process(dbs, rows):
+        for row in rows:
+            data = transform(row)
+            if data:
+                model(dbs, **kwargs).filterby('guid', row['guid']) \
+                    .update(data)
+
+    return ChunkedMigration(
+        dbs, name, model, process=process, chunk_size=chunk_size,
+        throttle=throttle, **kwargs).run()
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from .common import generate_guids
 
 __all__ = []
 
@@ -46,6 +47,14 @@ class BaseModel(object):
         # ]
         return []
 
+    @classmethod
+    def guid_generator(cls):
+        # callable(count) returning list of new rows guids, options:
+        #   generate_guids         - random guids (default)
+        #   generate_ordered_guids - time ordered guids for better
+        #                            index locality on large tables
+        return generate_guids
+
     @classmethod
     def default_orderby(cls):
         return []
@@ -66,6 +75,22 @@ class BaseModel(object):
         # }
         return {}
 
+    @classmethod
+    def data_batch_converters(cls):
+        # converters applied column-wise on each fetched batch, the
+        # callable takes list of column values and returns new list
+        # example:
+        # return {
+        #     'colname': batch_converter_callable,
+        # }
+        return {}
+
+    # schema version included in schema fingerprint, increase it to
+    # run upgrade_schema and initialize_data again on init_database
+    @classmethod
+    def schema_version(cls):
+        return 0
+
     @classmethod
     def upgrade_schema(cls, dbs, **kwargs):
         pass
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+from collections import deque
+
+__all__ = []
+
+
+class ConnectionPool(object):
+
+    def __init__(self, creator, ping=None, size=5, overflow=8,
+                 timeout=10, recycle=1800, idle_timeout=300):
+        # callable to create new db connection
+        self._creator = creator
+        # callable to check connection liveness, raise on dead conn
+        self._ping = ping
+
+        # max number of persistent connections
+        self.size = int(size)
+        # max number of extra connections over pool size
+        self.overflow = int(overflow)
+        # max seconds to wait for free connection
+        self.timeout = float(timeout)
+        # max connection age in seconds before recycle, 0 to disable
+        self.recycle = float(recycle)
+        # max idle seconds before recycle, 0 to disable
+        self.idle_timeout = float(idle_timeout)
+
+        # idle connections as (conn, created_ts, released_ts)
+        self._idle = deque()
+        # checked-out connections mapped to created_ts
+        self._in_use = {}
+        # number of reserved checkouts being validated or created
+        self._pending = 0
+
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+
+        # pool statistics
+        self._stats = {
+            'created': 0,
+            'checkouts': 0,
+            'recycled': 0,
+            'invalidated': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'timeouts': 0,
+        }
+
+    # get pool statistics snapshot
+    def stats(self):
+        with self._cond:
+            result = dict(self._stats)
+            result['size'] = self.size
+            result['overflow'] = self.overflow
+            result['in_use'] = len(self._in_use)
+            result['idle'] = len(self._idle)
+            result['avg_wait_time'] = \
+                result['wait_time'] / result['waits'] \
+                if result['waits'] else 0.0
+            return result
+
+    # checkout connection from pool
+    def acquire(self):
+        t_start = None
+        deadline = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+
+                if self._idle:
+                    conn, created, released = self._idle.pop()
+                    break
+
+                if len(self._in_use) + self._pending < \
+                        self.size + self.overflow:
+                    conn, created = None, None
+                    break
+
+                # wait for released connection
+                now = time.monotonic()
+                if deadline is None:
+                    t_start, deadline = now, now + self.timeout
+                    self._stats['waits'] += 1
+                if now >= deadline:
+                    self._stats['timeouts'] += 1
+                    raise RuntimeError(
+                        "timeout waiting for pool connection")
+                self._cond.wait(deadline - now)
+
+            # reserve slot for connection before releasing lock
+            self._pending += 1
+
+            if t_start is not None:
+                wait = time.monotonic() - t_start
+                self._stats['wait_time'] += wait
+                self._stats['max_wait_time'] = \
+                    max(self._stats['max_wait_time'], wait)
+
+        # validate idle connection outside lock
+        if conn is not None:
+            if self._is_stale(created, released):
+                with self._cond:
+                    self._stats['recycled'] += 1
+                self._discard(conn)
+                conn = None
+            elif self._ping:
+                try:
+                    self._ping(conn)
+                except Exception:
+                    with self._cond:
+                        self._stats['invalidated'] += 1
+                    self._discard(conn)
+                    conn = None
+
+        try:
+            if conn is None:
+                conn, created = self._creator(), time.monotonic()
+                with self._cond:
+                    self._stats['created'] += 1
+        except BaseException:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._pending -= 1
+            self._in_use[id(conn)] = created
+            self._stats['checkouts'] += 1
+
+        return conn
+
+    # return connection to pool
+    def release(self, conn, invalidate=False):
+        with self._cond:
+            created = self._in_use.pop(id(conn), None)
+            if not self._closed and not invalidate and \
+                    len(self._idle) < self.size:
+                self._idle.append((conn, created, time.monotonic()))
+                conn = None
+            elif invalidate:
+                self._stats['invalidated'] += 1
+            self._cond.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    # close all idle connections and reject new checkouts
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+            self._cond.notify_all()
+
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def _is_stale(self, created, released):
+        now = time.monotonic()
+        if self.recycle > 0 and created is not None and \
+                now - created >= self.recycle:
+            return True
+        if self.idle_timeout > 0 and now - released >= self.idle_timeout:
+            return True
+        return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -1,5 +1,12 @@
 # -*- coding: utf-8 -*-
-from .common import generate_guid, sql_identifier, data_mapping
+import copy
+import time
+import itertools
+
+from .common import sql_identifier, data_mapping, encode_cursor, \
+    decode_cursor
+from .rows import ROW_MODES
+from .export import write_rows, FORMATS as EXPORT_FORMATS
 
 __all__ = []
 
@@ -24,6 +31,16 @@ class Query(object):
         self._limit = 0
         self._offset = 0
 
+        # result rows mode: dict|tuple|namedtuple|index
+        self._rowmode = 'dict'
+
+        # results cache usage and ttl, None to use handler defaults
+        self._cache = None
+        self._cache_ttl = None
+
+        # allow routing reads to read replicas
+        self._replica = True
+
     # set columns to retreive
     def columns(self, *columns):
         self._columns = [sql_identifier(v) for v in columns]
@@ -78,45 +95,165 @@ class Query(object):
         self._offset = int(offset)
         return self
 
-    # return all elements matching filter params
-    def all(self):
-        limit_prefix = ""
-        if self.dbs.dbh.engine.backend == 'mssql':
-            if self._limit > 0 and not self._orderby:
-                limit_prefix = "TOP(%s) " % self._limit
-
-        q = "SELECT %s%s FROM %s" % (
-            limit_prefix,
-            ", ".join(self._columns) if self._columns else "*",
-            sql_identifier(self.table_name))
+    # set result rows mode:
+    #   dict       - dict per row (default)
+    #   tuple      - plain tuple per row
+    #   namedtuple - namedtuple per row, class built once per statement
+    #   index      - tuple row with precomputed column-index mapping,
+    #                supports access by column name or position
+    def rowmode(self, mode):
+        if mode not in ROW_MODES:
+            raise ValueError("invalid row mode: %s" % mode)
+        self._rowmode = mode
+        return self
 
-        if self._filters:
-            q += "\nWHERE %s" % (" ".join(self._filters))
-        if self._groupby:
-            q += "\nGROUP BY %s" % (", ".join(self._groupby))
-        if self._having:
-            q += "\nHAVING %s" % self._having
-        if self._orderby:
-            q += "\nORDER BY %s" % (", ".join(self._orderby))
-        if self.dbs.dbh.engine.backend == 'mssql':
-            if self._orderby:
-                if self._offset > 0 or self._limit > 0:
-                    q += "\nOFFSET %s ROWS" % int(self._offset)
-                if self._limit > 0:
-                    q += "\nFETCH NEXT %s ROWS ONLY" % int(self._limit)
-        else:
-            if self._limit > 0:
-                q += "\nLIMIT %s" % int(self._limit)
-            if self._offset > 0:
-                q += "\nOFFSET %s" % int(self._offset)
-        q += ";"
+    # enable or disable results cache for query, ttl in seconds
+    # overrides handler default ttl
+    def cache(self, enabled=True, ttl=None):
+        self._cache = bool(enabled)
+        self._cache_ttl = ttl
+        return self
 
-        result = []
-        for data in self.dbs.fetchall(q, params=self._execargs):
-            result.append(
-                data_mapping(self.model.data_converters(), data))
+    # read from primary database, bypassing read replicas for reads
+    # needing latest committed data
+    def primary(self):
+        self._replica = False
+        return self
 
-        return result
+    # return all elements matching filter params
+    def all(self):
+        return self._fetchall(self._select_sql(), rowmode=self._rowmode)
+
+    # iterate all elements matching filter params, rows are streamed
+    # from db in batches to keep memory usage flat
+    def iter(self, batch_size=1000):
+        for rows in self.dbs.fetchbatches(
+                self._select_sql(), params=self._execargs,
+                batch_size=batch_size, native=True,
+                rowmode=self._rowmode,
+                converters=self.model.data_converters(),
+                batch_converters=self.model.data_batch_converters()):
+            for data in rows:
+                yield data
+
+    # export elements matching filter params to csv or jsonl file
+    # path or file-like object, optionally gzip compressed. rows are
+    # streamed from db in batches and written incrementally, returns
+    # export statistics
+    def export(self, target, fmt='csv', compress=False, batch_size=1000):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError("invalid export format: %s" % fmt)
+
+        batches = self.dbs.fetchbatches(
+            self._select_sql(), params=self._execargs,
+            batch_size=batch_size, native=True,
+            rowmode='tuple' if fmt == 'csv' else 'dict',
+            converters=self.model.data_converters(),
+            batch_converters=self.model.data_batch_converters())
+        try:
+            stats = write_rows(
+                batches, target, fmt=fmt, compress=compress,
+                columns=self.dbs.result_columns)
+        finally:
+            batches.close()
+
+        if self.dbs.dbh.logger:
+            self.dbs.dbh.logger.info(
+                "(%s) - export %s: %s rows, %.1f rows/sec" % (
+                    self.dbs.dbh.options.get('database'), self.table_name,
+                    stats['rows'], stats['rows_per_sec']))
+        return stats
+
+    # return page of elements using keyset pagination on ordering
+    # columns, with guid as tie-breaker. returns elements list and
+    # opaque cursor for next page or None for last page
+    def page(self, size, cursor=None):
+        size = int(size)
+        if size <= 0:
+            raise ValueError("invalid page size")
+
+        keys = []
+        for v in self._orderby:
+            col, order = v.split(" ")
+            keys.append((col, order))
+        if 'guid' not in [k[0] for k in keys]:
+            keys.append(('guid', 'ASC'))
+        if self._columns:
+            for col, _ in keys:
+                if col not in self._columns:
+                    raise ValueError(
+                        "ordering column %s not in query columns" % col)
+
+        qry = copy.copy(self)
+        qry._orderby = ["%s %s" % k for k in keys]
+        qry._limit, qry._offset = size + 1, 0
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(keys):
+                raise ValueError("invalid cursor")
+            values = data_mapping(
+                self.model.data_adapters(),
+                dict(zip([k[0] for k in keys], values)))
+            values = [values[k[0]] for k in keys]
+            self._check_cursor_values(keys, values)
+
+            expr, params = self._keyset_filter(keys, values)
+            qry._filters = []
+            if self._filters:
+                qry._filters.append("(%s)" % " ".join(self._filters))
+            qry._filters.append(
+                "%s(%s)" % ("AND " if self._filters else "", expr))
+            qry._execargs = list(self._execargs) + params
+
+        result = qry.all()
+        if len(result) <= size:
+            return result, None
+
+        result = result[:size]
+        last = result[-1]
+        if self._rowmode == 'dict' or self._rowmode == 'index':
+            values = [last[k[0]] for k in keys]
+        else:
+            cols = self.dbs.result_columns()
+            values = [last[cols.index(k[0])] for k in keys]
+        self._check_cursor_values(keys, values)
+        return result, encode_cursor(values)
+
+    # NULL ordering values can't be compared in keyset seek predicate
+    # and would silently end pagination
+    def _check_cursor_values(self, keys, values):
+        for k, v in zip(keys, values):
+            if v is None:
+                raise ValueError(
+                    "NULL value of ordering column %s in page cursor"
+                    % k[0])
+
+    # build keyset seek predicate for ordering keys, uses row values
+    # comparison if supported and same ordering for all keys
+    def _keyset_filter(self, keys, values):
+        placeholder = self.dbs.dbh.options['sql_placeholder']
+
+        orders = set([k[1] for k in keys])
+        if len(orders) == 1 and self.dbs.dbh.engine.backend != 'mssql':
+            expr = "(%s) %s (%s)" % (
+                ", ".join([k[0] for k in keys]),
+                ">" if 'ASC' in orders else "<",
+                ", ".join([placeholder] * len(keys)))
+            return expr, list(values)
+
+        # expanded form: (a > x) OR (a = x AND b > y) OR ...
+        terms, params = [], []
+        for i, (col, order) in enumerate(keys):
+            conds = []
+            for j in range(i):
+                conds.append("%s=%s" % (keys[j][0], placeholder))
+                params.append(values[j])
+            conds.append("%s%s%s" % (
+                col, ">" if order == 'ASC' else "<", placeholder))
+            params.append(values[i])
+            terms.append("(%s)" % " AND ".join(conds))
+
+        return " OR ".join(terms), params
 
     # return first element matching filter params or None
     def first(self):
@@ -145,17 +282,41 @@ class Query(object):
         return self.one()
 
     def count(self):
-        q = "SELECT count(*) as count FROM %s" % (
-            sql_identifier(self.table_name))
-
-        if self._filters:
-            q += "\nWHERE %s" % (" ".join(self._filters))
-        if self._groupby:
-            q += "\nGROUP BY %s" % (", ".join(self._groupby))
-        q += ";"
-
-        result = self.dbs.fetchall(q, params=self._execargs)
-        return int(result[0]['count'])
+        result = self._fetchall(self._count_sql(), rowmode='tuple')
+        return int(result[0][0])
+
+    # return sum of column values, with grouping returns rows of
+    # grouping columns and aggregate value in sum column
+    def sum(self, column):
+        return self._aggregate('SUM', column)
+
+    # return min of column values, see sum()
+    def min(self, column):
+        return self._aggregate('MIN', column)
+
+    # return max of column values, see sum()
+    def max(self, column):
+        return self._aggregate('MAX', column)
+
+    # return average of column values, see sum()
+    def avg(self, column):
+        return self._aggregate('AVG', column)
+
+    # check if any element matches filter params
+    def exists(self):
+        result = self._fetchall(self._compile(
+            ('exists', tuple(self._filters), tuple(self._groupby),
+             self._having),
+            self._build_exists), rowmode='tuple')
+        return bool(result)
+
+    # get normalized query plan of all() statement or count()
+    # statement if count is set. analyze runs the statement to get
+    # actual run stats (pgsql only)
+    def explain(self, count=False, analyze=False):
+        sql = self._count_sql() if count else self._select_sql()
+        return self.dbs.explain(
+            sql, params=self._execargs, native=True, analyze=analyze)
 
     def insert(self, data):
         if type(data) is not dict:
@@ -166,26 +327,152 @@ class Query(object):
             guid = data['guid']
             del(data['guid'])
         else:
-            guid = generate_guid()
+            guid = self.model.guid_generator()(1)[0]
 
         columns, params = ['guid'], [guid]
         for k, v in data.items():
-            columns.append(sql_identifier(k))
+            columns.append(k)
             params.append(v)
 
-        q = "INSERT INTO %s" % self.table_name
-        q += "\n(%s)" % (", ".join(columns))
-        q += "\nVALUES"
-        q += "\n(%s)" % (", ".join(
-            [self.dbs.dbh.options['sql_placeholder']] * len(columns)))
-        q += ";"
-
-        self.dbs.execute(q, params=params)
-        if not self.dbs.in_transaction():
-            self.dbs.commit()
+        q = self._compile(
+            ('insert', tuple(columns), 1),
+            lambda: self._build_insert(columns))
+        self._write(q, params)
 
         return guid
 
+    # insert multiple elements in chunks, each chunk is committed
+    # separately unless in transaction. returns list of guids
+    def insert_many(self, data_list, chunk_size=500):
+        chunk_size = max(1, int(chunk_size))
+
+        guids, chunk = [], []
+        for data in data_list:
+            chunk.append(data)
+            if len(chunk) >= chunk_size:
+                guids.extend(self._insert_chunk(chunk)[0])
+                chunk = []
+        if chunk:
+            guids.extend(self._insert_chunk(chunk)[0])
+
+        return guids
+
+    # load elements using backend native bulk loader in single
+    # transaction unless in transaction, falls back to multi-row
+    # inserts if not supported. elements are streamed from iterable
+    # and must have same columns. returns load statistics
+    def bulk_load(self, data_list, chunk_size=10000):
+        chunk_size = max(1, int(chunk_size))
+        t_start = time.perf_counter()
+
+        data_list = iter(data_list)
+        first = next(data_list, None)
+        stats = {'rows': 0, 'elapsed': 0.0, 'rows_per_sec': 0.0}
+        if first is None:
+            return stats
+        if type(first) is not dict:
+            raise ValueError("invalid data type")
+        columns = ('guid',) + tuple(
+            [sql_identifier(k) for k in first.keys() if k != 'guid'])
+
+        counter = itertools.count(1)
+        rows = self._bulk_rows(
+            itertools.chain([first], data_list), columns, counter)
+
+        deferred = self.dbs.autobegin()
+        autocommit = not deferred and not self.dbs.in_transaction()
+        if autocommit:
+            self.dbs.begin()
+        try:
+            try:
+                self.dbs.bulk_load(
+                    self.table_name, columns, rows, chunk_size=chunk_size)
+            except NotImplementedError:
+                while True:
+                    chunk = list(itertools.islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    self._insert_rows(columns, chunk)
+            self.dbs.mark_written(self.table_name)
+            if autocommit:
+                self.dbs.commit()
+        except Exception as e:
+            if autocommit:
+                self.dbs.rollback()
+            elif deferred:
+                self._abort_deferred(e)
+            raise
+
+        # counter holds next row number
+        stats['rows'] = next(counter) - 1
+        if deferred:
+            self.dbs.autocommit(ops=stats['rows'])
+
+        stats['elapsed'] = time.perf_counter() - t_start
+        if stats['elapsed'] > 0:
+            stats['rows_per_sec'] = stats['rows'] / stats['elapsed']
+        if self.dbs.dbh.logger:
+            self.dbs.dbh.logger.info(
+                "(%s) - bulk load %s: %s rows, %.1f rows/sec" % (
+                    self.dbs.dbh.options.get('database'), self.table_name,
+                    stats['rows'], stats['rows_per_sec']))
+        return stats
+
+    # yield adapted rows values in columns order, counting rows.
+    # new guids are generated in batches
+    def _bulk_rows(self, data_list, columns, counter):
+        adapters = self.model.data_adapters()
+        generator = self.model.guid_generator()
+        new_guids = iter(())
+        for data in data_list:
+            if type(data) is not dict:
+                raise ValueError("invalid data type")
+
+            data = data_mapping(adapters, dict(data))
+            guid = data.pop('guid', None)
+            if not guid:
+                guid = next(new_guids, None)
+                if guid is None:
+                    new_guids = iter(generator(1000))
+                    guid = next(new_guids)
+            if len(data) != len(columns) - 1:
+                raise ValueError("inconsistent bulk load columns")
+            try:
+                row = [guid] + [data[c] for c in columns[1:]]
+            except KeyError as e:
+                raise ValueError("missing bulk load column: %s" % e)
+            next(counter)
+            yield row
+
+    # insert or update element matching the unique key columns,
+    # returns rows affected
+    def upsert(self, data, key='guid'):
+        if type(data) is not dict:
+            raise ValueError("invalid data type")
+
+        return self.upsert_many([data], key=key)
+
+    # insert or update multiple elements in chunks, each chunk is
+    # committed separately unless in transaction. returns rows affected
+    def upsert_many(self, data_list, key='guid', chunk_size=500):
+        chunk_size = max(1, int(chunk_size))
+        if type(key) is str:
+            key = (key,)
+        key = tuple([sql_identifier(k) for k in key])
+        if not key:
+            raise ValueError("invalid empty upsert key")
+
+        affected, chunk = 0, []
+        for data in data_list:
+            chunk.append(data)
+            if len(chunk) >= chunk_size:
+                affected += self._insert_chunk(chunk, key=key)[1]
+                chunk = []
+        if chunk:
+            affected += self._insert_chunk(chunk, key=key)[1]
+
+        return affected
+
     def update(self, data):
         if type(data) is not dict:
             raise ValueError("invalid data type")
@@ -197,35 +484,411 @@ class Query(object):
         columns, params = [], []
         for k, v in data.items():
             if type(v) is str and 'CASE' in v:
-                columns.append('%s=%s' % (sql_identifier(k), v))
+                columns.append((k, v))
             else:
-                columns.append('%s=%s' % (
-                    sql_identifier(k),
-                    self.dbs.dbh.options['sql_placeholder']))
+                columns.append((k, None))
                 params.append(v)
 
         params.extend(self._execargs)
 
-        q = "UPDATE %s" % self.table_name
-        q += "\nSET %s" % ", ".join(columns)
+        q = self._compile(
+            ('update', tuple(columns), tuple(self._filters)),
+            lambda: self._build_update(columns))
+        return self._write(q, params)
+
+    def delete(self):
+        q = self._compile(
+            ('delete', tuple(self._filters)), self._build_delete)
+        return self._write(q, self._execargs)
+
+    # run aggregate function on column, grouped rows are ordered by
+    # query ordering on grouping columns or aggregate value, and by
+    # grouping columns otherwise
+    def _aggregate(self, func, column):
+        column = sql_identifier(column)
+        alias = func.lower()
+        expr = "%s(%s)" % (func, column)
+        # mssql averages integer columns in integer arithmetic
+        if func == 'AVG' and self.dbs.dbh.engine.backend == 'mssql':
+            expr = "AVG(CAST(%s AS FLOAT))" % column
+
+        # min and max values are converted as column values
+        converters = self.model.data_converters()
+        batch_converters = self.model.data_batch_converters()
+        if func in ('MIN', 'MAX'):
+            if column in converters:
+                converters = dict(converters, **{alias: converters[column]})
+            if column in batch_converters:
+                batch_converters = dict(
+                    batch_converters, **{alias: batch_converters[column]})
+
+        # sqlite aggregates have no declared type, typed column alias
+        # applies the column type converters on min and max values
+        sql_alias = alias
+        if func in ('MIN', 'MAX') and \
+                self.dbs.dbh.engine.backend == 'sqlite':
+            coltype = self._column_type(column)
+            if coltype:
+                sql_alias = '"%s [%s]"' % (alias, coltype)
+
+        qry = copy.copy(self)
+        qry._columns = self._groupby + ["%s AS %s" % (expr, sql_alias)]
+        if not self._groupby:
+            qry._orderby, qry._limit, qry._offset = [], 0, 0
+            result = qry._fetchall(
+                qry._select_sql(), rowmode='tuple', converters=converters,
+                batch_converters=batch_converters)
+            return result[0][0] if result else None
+
+        qry._orderby = []
+        for v in self._orderby:
+            k = v.split(" ")
+            if k[0] == alias:
+                qry._orderby.append(" ".join([sql_alias] + k[1:]))
+            elif k[0] in self._groupby:
+                qry._orderby.append(v)
+        if not qry._orderby:
+            qry._orderby = ["%s ASC" % c for c in self._groupby]
+        return qry._fetchall(
+            qry._select_sql(), rowmode=self._rowmode, converters=converters,
+            batch_converters=batch_converters)
+
+    # get declared type name of model column, or None if not defined
+    def _column_type(self, column):
+        for c in self.model.table_columns():
+            if c[0] == column:
+                return c[1].split(" ")[0].split("(")[0].upper()
+        if column == 'guid':
+            return 'VARCHAR'
+        return None
+
+    # execute write statement and commit it unless in transaction,
+    # commit follows session commit policy. returns rows affected
+    def _write(self, sql, params):
+        deferred = self.dbs.autobegin()
+        try:
+            self.dbs.execute(sql, params=params, native=True)
+        except Exception as e:
+            if deferred:
+                self._abort_deferred(e)
+            raise
+        affected = self.dbs.rowsaffected()
+
+        self.dbs.mark_written(self.table_name)
+        self.dbs.autocommit()
+        return affected
+
+    # rollback session deferred writes after failed write
+    def _abort_deferred(self, err):
+        lost = self.dbs.autorollback()
+        if lost:
+            raise RuntimeError(
+                "%s, %s deferred writes lost" % (err, lost)) from err
+
+    # insert or upsert chunk of rows in single transaction, returns
+    # list of guids and total rows affected
+    def _insert_chunk(self, chunk, key=None):
+        adapters = self.model.data_adapters()
+
+        for data in chunk:
+            if type(data) is not dict:
+                raise ValueError("invalid data type")
+        new_guids = iter(self.model.guid_generator()(
+            len([1 for data in chunk if 'guid' not in data])))
+
+        # group rows by columns set
+        guids, groups = [], {}
+        for data in chunk:
+            data = data_mapping(adapters, dict(data))
+            if 'guid' in data:
+                guid = data.pop('guid')
+            else:
+                guid = next(new_guids)
+            guids.append(guid)
+
+            columns = ('guid',) + tuple(data.keys())
+            if columns not in groups:
+                groups[columns] = []
+            groups[columns].append([guid] + list(data.values()))
+
+        # same key can't be affected twice by one upsert statement,
+        # keep last row for duplicate keys
+        if key:
+            for columns, rows in groups.items():
+                for k in key:
+                    if k not in columns:
+                        raise ValueError("missing upsert key: %s" % k)
+                idx = [columns.index(k) for k in key]
+                uniq = {}
+                for row in rows:
+                    uniq[tuple([row[i] for i in idx])] = row
+                groups[columns] = list(uniq.values())
+
+        affected = 0
+        deferred = self.dbs.autobegin()
+        autocommit = not deferred and not self.dbs.in_transaction()
+        if autocommit:
+            self.dbs.begin()
+        try:
+            for columns, rows in groups.items():
+                affected += self._insert_rows(columns, rows, key=key)
+            self.dbs.mark_written(self.table_name)
+            if autocommit:
+                self.dbs.commit()
+        except Exception as e:
+            if autocommit:
+                self.dbs.rollback()
+            elif deferred:
+                self._abort_deferred(e)
+            raise
+
+        if deferred:
+            self.dbs.autocommit(ops=len(guids))
+        return guids, affected
+
+    # insert or upsert rows using multi-row VALUES statements within
+    # backend limits for bound params and rows per statement
+    def _insert_rows(self, columns, rows, key=None):
+        engine = self.dbs.dbh.engine
+        size = max(1, min(
+            engine.max_insert_rows, engine.max_params // len(columns)))
+
+        affected = 0
+        for i in range(0, len(rows), size):
+            batch = rows[i:i + size]
+            if key:
+                q = self._compile(
+                    ('upsert', columns, key, len(batch)),
+                    lambda n=len(batch): self._build_upsert(
+                        columns, key, nrows=n))
+            else:
+                q = self._compile(
+                    ('insert', columns, len(batch)),
+                    lambda n=len(batch): self._build_insert(
+                        columns, nrows=n))
+
+            params = []
+            for row in batch:
+                params.extend(row)
+            self.dbs.execute(q, params=params, native=True)
+            affected += max(0, self.dbs.rowsaffected())
+
+        return affected
+
+    # fetch all result rows, using results cache if enabled and
+    # session is not dirty. reads may be routed to read replicas.
+    # converters default to model converters
+    def _fetchall(self, sql, rowmode='dict', converters=None,
+                  batch_converters=None):
+        cache = self.dbs.dbh.result_cache
+        use_cache = cache is not None and (
+            self._cache if self._cache is not None
+            else self.dbs.dbh.options['result_cache'].get('default', True))
+        # uncommitted data is not shared with other sessions
+        if use_cache and self.dbs.is_dirty():
+            use_cache = False
+        if use_cache:
+            try:
+                key = (sql, tuple(self._execargs), rowmode)
+                hash(key)
+            except TypeError:
+                use_cache = False
+
+        if use_cache:
+            entry = cache.get(key)
+            if entry is not None:
+                self.dbs.set_result_columns(entry[0])
+                return self._copy_rows(entry[1], rowmode)
+            generation = cache.generation(self.table_name)
+
+        rows = self.dbs.fetchall(
+            sql, params=self._execargs, native=True, rowmode=rowmode,
+            converters=self.model.data_converters()
+            if converters is None else converters,
+            batch_converters=self.model.data_batch_converters()
+            if batch_converters is None else batch_converters,
+            replica=self._replica)
+
+        # cached with result columns to restore on cache hits
+        if use_cache:
+            cache.set(
+                key, self.table_name,
+                (tuple(self.dbs.result_columns()),
+                 self._copy_rows(rows, rowmode)),
+                generation=generation, ttl=self._cache_ttl)
+
+        return rows
+
+    # cached dict rows are copied to isolate cache from callers
+    def _copy_rows(self, rows, rowmode):
+        if rowmode == 'dict':
+            return [dict(r) for r in rows]
+        return list(rows)
+
+    # get backend ready sql statement from statement cache, the key
+    # holds the query shape and the builder returns generic sql
+    def _compile(self, key, builder):
+        key = (self.dbs.dbh.engine.backend, self.model,
+               self.table_name) + key
+        return self.dbs.dbh.stmt_cache.get(
+            key, lambda: self.dbs.native_sql(builder()))
+
+    def _select_sql(self):
+        return self._compile(
+            ('select', tuple(self._columns), tuple(self._filters),
+             tuple(self._groupby), self._having, tuple(self._orderby),
+             self._limit, self._offset),
+            self._build_select)
+
+    def _count_sql(self):
+        return self._compile(
+            ('count', tuple(self._filters), tuple(self._groupby)),
+            self._build_count)
+
+    def _build_select(self):
+        limit_prefix = ""
+        if self.dbs.dbh.engine.backend == 'mssql':
+            if self._limit > 0 and not self._orderby:
+                limit_prefix = "TOP(%s) " % self._limit
+
+        q = "SELECT %s%s FROM %s" % (
+            limit_prefix,
+            ", ".join(self._columns) if self._columns else "*",
+            sql_identifier(self.table_name))
+
         if self._filters:
             q += "\nWHERE %s" % (" ".join(self._filters))
+        if self._groupby:
+            q += "\nGROUP BY %s" % (", ".join(self._groupby))
+        if self._having:
+            q += "\nHAVING %s" % self._having
+        if self._orderby:
+            q += "\nORDER BY %s" % (", ".join(self._orderby))
+        if self.dbs.dbh.engine.backend == 'mssql':
+            if self._orderby:
+                if self._offset > 0 or self._limit > 0:
+                    q += "\nOFFSET %s ROWS" % int(self._offset)
+                if self._limit > 0:
+                    q += "\nFETCH NEXT %s ROWS ONLY" % int(self._limit)
+        else:
+            if self._limit > 0:
+                q += "\nLIMIT %s" % int(self._limit)
+            if self._offset > 0:
+                q += "\nOFFSET %s" % int(self._offset)
         q += ";"
 
-        self.dbs.execute(q, params=params)
-        if not self.dbs.in_transaction():
-            self.dbs.commit()
+        return q
 
-        return self.dbs.rowsaffected()
+    def _build_count(self):
+        q = "SELECT count(*) as count FROM %s" % (
+            sql_identifier(self.table_name))
+
+        if self._filters:
+            q += "\nWHERE %s" % (" ".join(self._filters))
+        if self._groupby:
+            q += "\nGROUP BY %s" % (", ".join(self._groupby))
+        q += ";"
+
+        return q
+
+    def _build_exists(self):
+        top = ""
+        if self.dbs.dbh.engine.backend == 'mssql':
+            top = "TOP(1) "
+
+        q = "SELECT %s1 AS found FROM %s" % (
+            top, sql_identifier(self.table_name))
 
-    def delete(self):
-        q = "DELETE FROM %s" % self.table_name
         if self._filters:
             q += "\nWHERE %s" % (" ".join(self._filters))
+        if self._groupby:
+            q += "\nGROUP BY %s" % (", ".join(self._groupby))
+        if self._having:
+            q += "\nHAVING %s" % self._having
+        if self.dbs.dbh.engine.backend != 'mssql':
+            q += "\nLIMIT 1"
+        q += ";"
+
+        return q
+
+    def _build_insert(self, columns, nrows=1):
+        values = "(%s)" % (", ".join(
+            [self.dbs.dbh.options['sql_placeholder']] * len(columns)))
+
+        q = "INSERT INTO %s" % self.table_name
+        q += "\n(%s)" % (", ".join([sql_identifier(c) for c in columns]))
+        q += "\nVALUES"
+        q += "\n%s" % (",\n".join([values] * nrows))
         q += ";"
 
-        self.dbs.execute(q, params=self._execargs)
-        if not self.dbs.in_transaction():
-            self.dbs.commit()
+        return q
+
+    # build native upsert statement for backend, existing rows
+    # matching key columns are updated except for guid column
+    def _build_upsert(self, columns, key, nrows=1):
+        backend = self.dbs.dbh.engine.backend
+        placeholder = self.dbs.dbh.options['sql_placeholder']
+        values = "(%s)" % (", ".join([placeholder] * len(columns)))
+
+        columns = [sql_identifier(c) for c in columns]
+        updates = [c for c in columns if c not in key and c != 'guid']
+
+        if backend == 'mssql':
+            q = "MERGE INTO %s WITH (HOLDLOCK) AS tgt" % self.table_name
+            q += "\nUSING (VALUES\n%s\n) AS src (%s)" % (
+                ",\n".join([values] * nrows), ", ".join(columns))
+            q += "\nON %s" % (" AND ".join(
+                ["tgt.%s=src.%s" % (k, k) for k in key]))
+            if updates:
+                q += "\nWHEN MATCHED THEN UPDATE SET %s" % (", ".join(
+                    ["%s=src.%s" % (c, c) for c in updates]))
+            q += "\nWHEN NOT MATCHED THEN INSERT (%s)" % (
+                ", ".join(columns))
+            q += "\nVALUES (%s)" % (", ".join(
+                ["src.%s" % c for c in columns]))
+            q += ";"
+            return q
+
+        q = "INSERT INTO %s" % self.table_name
+        q += "\n(%s)" % (", ".join(columns))
+        q += "\nVALUES"
+        q += "\n%s" % (",\n".join([values] * nrows))
+        if backend == 'mysql':
+            q += "\nON DUPLICATE KEY UPDATE %s" % (", ".join(
+                ["%s=VALUES(%s)" % (c, c) for c in updates] or
+                ["%s=%s" % (key[0], key[0])]))
+        else:
+            q += "\nON CONFLICT (%s)" % (", ".join(key))
+            if updates:
+                q += " DO UPDATE SET %s" % (", ".join(
+                    ["%s=excluded.%s" % (c, c) for c in updates]))
+            else:
+                q += " DO NOTHING"
+        q += ";"
+
+        return q
+
+    # columns as list of (colname, expr), where expr is the raw sql
+    # expression to set or None to bind value to param placeholder
+    def _build_update(self, columns):
+        exprs = []
+        for k, v in columns:
+            exprs.append('%s=%s' % (
+                sql_identifier(k),
+                v or self.dbs.dbh.options['sql_placeholder']))
+
+        q = "UPDATE %s" % self.table_name
+        q += "\nSET %s" % ", ".join(exprs)
+        if self._filters:
+            q += "\nWHERE %s" % (" ".join(self._filters))
+        q += ";"
+
+        return q
+
+    def _build_delete(self):
+        q = "DELETE FROM %s" % self.table_name
+        if self._filters:
+            q += "\nWHERE %s" % (" ".join(self._filters))
+        q += ";"
 
-        return self.dbs.rowsaffected()
+        return q
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+
+from .retry import RetryPolicy, CONNECTION
+
+__all__ = []
+
+
+# replica statements retry policy, connection errors are not retried
+# and fail over to other replicas or primary
+class ReplicaRetryPolicy(RetryPolicy):
+
+    def should_retry(self, kind, attempt, in_transaction,
+                     busy_aborts_transaction=False):
+        if kind == CONNECTION:
+            return False
+        return super(ReplicaRetryPolicy, self).should_retry(
+            kind, attempt, in_transaction,
+            busy_aborts_transaction=busy_aborts_transaction)
+
+
+class Replica(object):
+
+    def __init__(self, dbh):
+        # replica database handler
+        self.dbh = dbh
+
+        # in-flight requests
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+
+        # consecutive failures and ejection end time
+        self.failures = 0
+        self.ejected_until = 0
+
+    def is_ejected(self, now=None):
+        return self.ejected_until > (now or time.monotonic())
+
+
+# read replicas set with load balancing and temporary ejection of
+# failed replicas. ejected replicas rejoin after eject timeout, which
+# doubles with consecutive failures up to max eject timeout.
+class ReplicaSet(object):
+
+    ROUTINGS = ['least_outstanding', 'round_robin']
+
+    def __init__(self, handlers, routing='least_outstanding',
+                 eject_timeout=30, max_eject_timeout=300):
+        if routing not in self.ROUTINGS:
+            raise ValueError("invalid replicas routing: %s" % routing)
+
+        self.replicas = [Replica(dbh) for dbh in handlers]
+        self.routing = routing
+        # seconds to eject failed replica
+        self.eject_timeout = float(eject_timeout)
+        self.max_eject_timeout = float(max_eject_timeout)
+
+        self._next = 0
+        self._lock = threading.Lock()
+
+    # select available replica for request, returns None if all
+    # replicas are ejected
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            count = len(self.replicas)
+            candidates = []
+            for i in range(count):
+                replica = self.replicas[(self._next + i) % count]
+                if not replica.is_ejected(now):
+                    candidates.append(replica)
+            self._next = (self._next + 1) % count
+            if not candidates:
+                return None
+
+            # candidates are rotated so ties are spread evenly
+            replica = candidates[0]
+            if self.routing == 'least_outstanding':
+                replica = min(candidates, key=lambda r: r.outstanding)
+
+            replica.outstanding += 1
+            replica.requests += 1
+            return replica
+
+    # release replica after request, failed replica is ejected
+    def release(self, replica, failed=False):
+        with self._lock:
+            replica.outstanding -= 1
+            if failed:
+                self._eject(replica)
+            else:
+                replica.failures = 0
+
+    # execute read statement on replica, failed replicas are ejected
+    # and statement is retried on next replica. returns tuple of
+    # result rows and columns, or None if no replica is available
+    def fetchall(self, sql, params=None, logger=None, **kwargs):
+        while True:
+            replica = self.acquire()
+            if not replica:
+                return None
+
+            # replicas log with primary handler logger
+            replica.dbh.logger = logger
+            dbs = replica.dbh.session()
+            failed = False
+            try:
+                try:
+                    dbs.connect()
+                except Exception as e:
+                    failed = True
+                    self._log_failover(replica, e)
+                    continue
+
+                try:
+                    rows = dbs.fetchall(
+                        sql, params=params, native=True, **kwargs)
+                except RuntimeError as e:
+                    # errors raised without driver error, ie. open
+                    # circuit breaker, are not classified
+                    if e.__cause__ is None or \
+                            replica.dbh.engine.classify_error(
+                                e.__cause__) != CONNECTION:
+                        raise
+                    failed = True
+                    self._log_failover(replica, e)
+                    continue
+
+                return rows, dbs.result_columns()
+            finally:
+                # replica is released on any error
+                self.release(replica, failed=failed)
+                try:
+                    dbs.close()
+                except Exception:
+                    pass
+
+    # check all replicas connections, failed replicas are ejected and
+    # healthy replicas rejoin. returns list of replicas health
+    def health_check(self):
+        result = []
+        for replica in self.replicas:
+            try:
+                conn = replica.dbh.acquire()
+                invalidate = False
+                try:
+                    replica.dbh.engine.ping(conn)
+                except Exception:
+                    invalidate = True
+                    raise
+                finally:
+                    replica.dbh.release(conn, invalidate=invalidate)
+            except Exception:
+                with self._lock:
+                    self._eject(replica)
+                result.append(False)
+                continue
+
+            with self._lock:
+                replica.failures = 0
+                replica.ejected_until = 0
+            result.append(True)
+        return result
+
+    # get replicas statistics
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return [{
+                'database': r.dbh.options.get('database'),
+                'outstanding': r.outstanding,
+                'requests': r.requests,
+                'errors': r.errors,
+                'ejected': r.is_ejected(now),
+            } for r in self.replicas]
+
+    # close replicas handlers
+    def close(self):
+        for replica in self.replicas:
+            replica.dbh.close()
+
+    def _log_failover(self, replica, err):
+        logger = replica.dbh.logger
+        if logger:
+            logger.warning(
+                "(%s) - replica ejected: %s"
+                % (replica.dbh.options.get('database'), err))
+
+    def _eject(self, replica):
+        replica.errors += 1
+        replica.failures += 1
+        timeout = min(
+            self.max_eject_timeout,
+            self.eject_timeout * (2 ** min(replica.failures - 1, 16)))
+        replica.ejected_until = time.monotonic() + timeout
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import time
+import random
+import threading
+
+__all__ = []
+
+
+# transient error kinds returned by engines error classification
+BUSY = 'busy'
+DEADLOCK = 'deadlock'
+SERIALIZATION = 'serialization'
+CONNECTION = 'connection'
+
+
+# statement retry policy with exponential backoff and jitter,
+# subclass and override methods to customize retry decisions
+class RetryPolicy(object):
+
+    def __init__(self, retries=10, delay=0.5, max_delay=5,
+                 deadline=0, jitter=True):
+        # max number of retries after first attempt
+        self.retries = int(retries)
+        # base backoff delay in seconds
+        self.delay = float(delay)
+        # max backoff delay in seconds
+        self.max_delay = float(max_delay)
+        # max total seconds for all attempts, 0 to disable
+        self.deadline = float(deadline)
+        # randomize delays to spread concurrent retries
+        self.jitter = bool(jitter)
+
+    # check if failed statement should be retried, kind is the
+    # transient error kind or None for non-transient errors
+    def should_retry(self, kind, attempt, in_transaction,
+                     busy_aborts_transaction=False):
+        if attempt >= self.retries:
+            return False
+
+        # lock/busy errors abort the statement only, unless backend
+        # aborts the whole transaction on any error
+        if kind == BUSY:
+            return not (in_transaction and busy_aborts_transaction)
+
+        # deadlock, serialization and connection errors abort the
+        # whole transaction, only standalone statements are retried
+        if kind in (DEADLOCK, SERIALIZATION, CONNECTION):
+            return not in_transaction
+
+        return False
+
+    # get backoff delay in seconds before retry attempt
+    def backoff(self, attempt):
+        delay = min(self.max_delay, self.delay * (2 ** attempt))
+        if self.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+
+# circuit breaker to fail fast while backend is unavailable. opens
+# after threshold consecutive connection failures and allows single
+# trial call after reset timeout.
+class CircuitBreaker(object):
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        # consecutive failures to open circuit
+        self.threshold = int(threshold)
+        # seconds to keep circuit open before trial call
+        self.reset_timeout = float(reset_timeout)
+
+        self._failures = 0
+        self._opened_ts = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        with self._lock:
+            return self._opened_ts is not None
+
+    # check circuit before call, raise error when open
+    def check(self):
+        with self._lock:
+            if self._opened_ts is None:
+                return
+            if not self._trial and \
+                    time.monotonic() - self._opened_ts >= \
+                    self.reset_timeout:
+                # half open, allow single trial call
+                self._trial = True
+                return
+            raise RuntimeError(
+                "circuit breaker open, database unavailable")
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_ts = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_ts = time.monotonic()
+                self._trial = False
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import functools
+from collections import namedtuple
+
+__all__ = []
+
+
+# supported result row modes
+ROW_MODES = ['dict', 'tuple', 'namedtuple', 'index']
+
+
+# tuple row with precomputed column-index mapping, supports
+# access by column position or column name
+class IndexedRow(tuple):
+
+    __slots__ = ()
+
+    _index = {}
+
+    def __getitem__(self, key):
+        if type(key) is str:
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def __repr__(self):
+        return "<Row %s>" % ", ".join([
+            "%s=%r" % (k, tuple.__getitem__(self, i))
+            for k, i in self._index.items()])
+
+    def keys(self):
+        return list(self._index.keys())
+
+    def get(self, key, default=None):
+        if key in self._index:
+            return tuple.__getitem__(self, self._index[key])
+        return default
+
+    def asdict(self):
+        return dict(zip(self._index.keys(), self))
+
+
+@functools.lru_cache(maxsize=256)
+def namedtuple_class(columns):
+    return namedtuple('Row', columns, rename=True)
+
+
+@functools.lru_cache(maxsize=256)
+def indexedrow_class(columns):
+    return type('Row', (IndexedRow,), {
+        '__slots__': (),
+        '_index': {c: i for i, c in enumerate(columns)},
+    })
+
+
+# get column names from cursor description
+def description_columns(description):
+    return tuple([d[0] for d in description or []])
+
+
+# compiled row builder for statement result columns, built once per
+# statement. converters are compiled into fixed (position, callable)
+# pairs, row converters take single value and batch converters take
+# whole column values list of fetched batch and return new list.
+class RowBuilder(object):
+
+    def __init__(self, columns, mode='dict', converters=None,
+                 batch_converters=None):
+        if mode not in ROW_MODES:
+            raise ValueError("invalid row mode: %s" % mode)
+
+        self.columns = tuple(columns)
+        self.mode = mode
+
+        converters = converters or {}
+        batch_converters = batch_converters or {}
+        self._conv = [
+            (i, converters[c]) for i, c in enumerate(self.columns)
+            if c in converters]
+        self._bconv = [
+            (i, batch_converters[c]) for i, c in enumerate(self.columns)
+            if c in batch_converters]
+
+        if mode == 'dict':
+            self._build = functools.partial(_build_dict, self.columns)
+        elif mode == 'namedtuple':
+            self._build = namedtuple_class(self.columns)._make
+        elif mode == 'index':
+            self._build = indexedrow_class(self.columns)
+        else:
+            self._build = tuple
+
+    # build batch of rows, converters are applied column-wise
+    def build(self, rows):
+        if not rows:
+            return []
+        if not (self._conv or self._bconv):
+            return list(map(self._build, rows))
+
+        cols = list(zip(*rows))
+        for i, fn in self._conv:
+            cols[i] = list(map(fn, cols[i]))
+        for i, fn in self._bconv:
+            cols[i] = fn(list(cols[i]))
+            if len(cols[i]) != len(rows):
+                raise ValueError(
+                    "invalid batch converter result for column %s"
+                    % self.columns[i])
+
+        return list(map(self._build, zip(*cols)))
+
+
+def _build_dict(columns, row):
+    return dict(zip(columns, row))
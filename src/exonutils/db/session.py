@@ -4,6 +4,7 @@ import time
 import logging
 
 from .query import Query
+from .rows import RowBuilder, description_columns
 
 __all__ = []
 
@@ -18,6 +19,38 @@ class Session(object):
         self._cur = None
         self._in_transaction = False
 
+        # cursor or writer result of last executed statement
+        self._result = None
+
+        # retries count of last executed statement
+        self._retries = 0
+
+        # write transaction in sqlite single writer mode
+        self._writer_txn = None
+
+        # result columns of last fetched statement
+        self._result_columns = ()
+
+        # tables modified by session writes since last commit
+        self._written_tables = set()
+
+        # session reads go to primary after first executed statement,
+        # so session reads its own writes despite replicas lag
+        self._read_primary = False
+
+        # deferred autocommit policy, commit autocommitted writes
+        # every number of ops or interval seconds, 0 to disable
+        policy = self.dbh.options.get("commit_policy") or {}
+        self._commit_ops = 0
+        self._commit_interval = 0
+        self.commit_policy(
+            ops=policy.get('ops', 0), interval=policy.get('interval', 0))
+
+        # deferred transaction state of autocommitted writes
+        self._deferred = False
+        self._deferred_ts = 0
+        self._pending_ops = 0
+
     def __enter__(self):
         return self
 
@@ -31,11 +64,99 @@ class Session(object):
     def query(self, model, **kwargs):
         return Query(self, model, **kwargs)
 
+    # mark table as modified, invalidates cached query results
+    def mark_written(self, table):
+        self._written_tables.add(table)
+        if self.dbh.result_cache:
+            self.dbh.result_cache.invalidate(table)
+
     def is_connected(self):
         return bool(self._conn)
 
+    # check if session has open transaction or uncommitted writes,
+    # results read by dirty session must not be shared
+    def is_dirty(self):
+        return bool(self._in_transaction or self._written_tables)
+
+    # check if in explicit transaction, deferred autocommit
+    # transaction is not reported
     def in_transaction(self):
-        return bool(self._in_transaction)
+        return bool(self._in_transaction and not self._deferred)
+
+    # set deferred autocommit policy, autocommitted writes are
+    # committed every number of ops or interval in milliseconds
+    # whichever comes first, 0 for both to commit each write
+    def commit_policy(self, ops=0, interval=0):
+        if int(ops) < 0 or float(interval) < 0:
+            raise ValueError("invalid commit policy")
+        self._commit_ops = int(ops)
+        self._commit_interval = float(interval) / 1000.0
+
+    # get number of autocommitted writes pending in deferred commit
+    def pending_writes(self):
+        return self._pending_ops
+
+    # begin deferred transaction for autocommitted writes if commit
+    # policy is set, returns True if writes are deferred
+    def autobegin(self):
+        if not self._commit_ops and not self._commit_interval:
+            return False
+        if self._deferred:
+            return True
+        if self._in_transaction:
+            return False
+
+        self.begin()
+        self._deferred = True
+        self._deferred_ts = time.monotonic()
+        self._pending_ops = 0
+        return True
+
+    # commit autocommitted writes, deferred writes are committed when
+    # policy ops count or interval is reached
+    def autocommit(self, ops=1):
+        if self._deferred:
+            self._pending_ops += ops
+            if (self._commit_ops and
+                    self._pending_ops >= self._commit_ops) or \
+                    (self._commit_interval and
+                     time.monotonic() - self._deferred_ts >=
+                     self._commit_interval):
+                self.flush()
+        elif not self._in_transaction:
+            self.commit()
+
+    # rollback deferred writes after failed write, returns number of
+    # lost autocommitted writes
+    def autorollback(self):
+        if not self._deferred:
+            return 0
+
+        lost = self._pending_ops
+        try:
+            self.rollback()
+        except Exception:
+            pass
+        return lost
+
+    # commit pending deferred writes, returns number of committed
+    # writes. raises RuntimeError with lost writes count on failure
+    def flush(self):
+        if not self._deferred:
+            return 0
+
+        ops = self._pending_ops
+        try:
+            self.commit()
+        except Exception as e:
+            try:
+                self.rollback()
+            except Exception:
+                pass
+            raise RuntimeError(
+                "deferred commit failed, %s writes lost: %s" % (ops, e)) \
+                from e
+        return ops
 
     def connect(self):
         if not self._conn:
@@ -43,62 +164,367 @@ class Session(object):
                 self.dbh.logger.debug(
                     "(%s) - connect" % self.dbh.options.get('database'))
 
-            self._conn = self.dbh.engine.connection(self.dbh.options)
+            breaker = self.dbh.circuit_breaker
+            if breaker:
+                breaker.check()
+            try:
+                self._conn = self.dbh.acquire()
+            except Exception:
+                if breaker:
+                    breaker.failure()
+                raise
+            # backend is reachable, closes half open circuit
+            if breaker:
+                breaker.success()
             self._cur = self._conn.cursor()
             self._in_transaction = False
 
     def close(self):
+        # commit pending deferred writes
+        err = None
+        if self._deferred:
+            try:
+                self.flush()
+            except Exception as e:
+                err = e
+
+        # abort unfinished writer transaction
+        if self._writer_txn:
+            txn, self._writer_txn = self._writer_txn, None
+            try:
+                txn.rollback().result()
+            except Exception:
+                pass
+
         if self._conn:
             if self.dbh.logger:
                 self.dbh.logger.debug(
                     "(%s) - close" % self.dbh.options.get('database'))
 
-            self._conn.close()
+            # reset connection state before returning to pool
+            invalidate = False
+            try:
+                self._cur.close()
+                if self.dbh.pool:
+                    self._conn.rollback()
+            except Exception:
+                invalidate = True
+            self.dbh.release(self._conn, invalidate=invalidate)
 
         self._conn = None
         self._cur = None
+        self._result = None
         self._in_transaction = False
+        self._written_tables = set()
+        self._read_primary = False
+        self._deferred = False
+        self._pending_ops = 0
 
-    def execute(self, sql, params=None):
-        self.connect()
+        if err:
+            raise err
 
-        sql = sql.replace(
+    # translate sql placeholders to backend native placeholders
+    def native_sql(self, sql):
+        return sql.replace(
             self.dbh.options['sql_placeholder'],
             self.dbh.engine.sql_placeholder)
+
+    # execute sql statement, native sql statements are already
+    # translated to backend placeholders
+    def execute(self, sql, params=None, native=False):
+        self.connect()
+        self._read_primary = True
+
+        if not native:
+            sql = self.native_sql(sql)
         self.log_sql(sql, params=params)
 
-        err = ""
-        for i in range(self.dbh.options['retries']):
+        t_start = time.perf_counter()
+        self._result = self._execute(sql, params)
+        self._record(
+            sql, time.perf_counter() - t_start,
+            rows=self._result.rowcount)
+
+    # execute sql statement and return all result rows, rows are
+    # built in rowmode with converters applied by column position.
+    # replica allows routing statement to read replicas outside
+    # transactions for sessions without executed writes
+    def fetchall(self, sql, params=None, native=False, rowmode='dict',
+                 converters=None, batch_converters=None, replica=False):
+        if not native:
+            sql = self.native_sql(sql)
+
+        if replica and self.dbh.replicas and \
+                not self._in_transaction and not self._read_primary:
+            result = self.dbh.replicas.fetchall(
+                sql, params=params, logger=self.dbh.logger,
+                rowmode=rowmode, converters=converters,
+                batch_converters=batch_converters)
+            # all replicas ejected, fall back to primary
+            if result is not None:
+                rows, self._result_columns = result
+                return rows
+
+        self.connect()
+        self.log_sql(sql, params=params)
+
+        t_start = time.perf_counter()
+        self._result = self._execute(sql, params)
+        rows = self._result.fetchall()
+        self._record(sql, time.perf_counter() - t_start, rows=len(rows))
+
+        self._result_columns = description_columns(
+            self._result.description)
+        builder = RowBuilder(
+            self._result_columns, mode=rowmode, converters=converters,
+            batch_converters=batch_converters)
+        return builder.build(rows)
+
+    # execute sql statement and yield result rows in batches using
+    # backend streaming cursor, the session connection can't be used
+    # for other statements till iteration ends
+    def fetchbatches(self, sql, params=None, batch_size=1000,
+                     native=False, rowmode='dict', converters=None,
+                     batch_converters=None):
+        self.connect()
+
+        if not native:
+            sql = self.native_sql(sql)
+        self.log_sql(sql, params=params)
+
+        t_start = time.perf_counter()
+        cur = self._execute(sql, params, batch_size=batch_size)
+        elapsed = time.perf_counter() - t_start
+        nrows = 0
+        try:
+            builder = None
+            while True:
+                # consumer time between batches is not counted
+                t_start = time.perf_counter()
+                rows = cur.fetchmany(batch_size)
+                elapsed += time.perf_counter() - t_start
+                if not rows:
+                    break
+                nrows += len(rows)
+
+                # server side cursors set description after first fetch
+                if not builder:
+                    self._result_columns = \
+                        description_columns(cur.description)
+                    builder = RowBuilder(
+                        self._result_columns, mode=rowmode,
+                        converters=converters,
+                        batch_converters=batch_converters)
+                yield builder.build(rows)
+        finally:
+            cur.close()
+            self._record(sql, elapsed, rows=nrows)
+
+    # load rows tuples into table using backend native bulk loader,
+    # rows are consumed lazily from iterable. returns loaded rows
+    # count. raises NotImplementedError before reading any rows if
+    # bulk load is not supported by backend or access mode
+    def bulk_load(self, table, columns, rows, chunk_size=10000):
+        # writer connection is owned by writer thread
+        if self.dbh.writer:
+            raise NotImplementedError()
+
+        self.connect()
+        self._read_primary = True
+
+        sql = "BULK LOAD %s (%s)" % (table, ", ".join(columns))
+        self.log_sql(sql)
+
+        t_start = time.perf_counter()
+        self._retries = 0
+        try:
+            count = self.dbh.engine.bulk_load(
+                self._conn, self.dbh.options, table, columns, rows,
+                chunk_size=chunk_size)
+        except NotImplementedError:
+            raise
+        except Exception as e:
+            self._record(sql, time.perf_counter() - t_start, error=True)
+            if isinstance(e, (RuntimeError, ValueError)):
+                raise
+            raise RuntimeError(str(e)) from e
+        self._record(sql, time.perf_counter() - t_start, rows=count)
+        return count
+
+    # get normalized query plan of sql statement, see engine explain
+    def explain(self, sql, params=None, native=False, analyze=False):
+        self.connect()
+
+        if not native:
+            sql = self.native_sql(sql)
+        self.log_sql(sql, params=params)
+
+        try:
+            return self.dbh.engine.explain(
+                self._conn, sql, params=params, analyze=analyze)
+        except (RuntimeError, ValueError, NotImplementedError):
+            raise
+        except Exception as e:
+            raise RuntimeError(str(e)) from e
+
+    # get column names of last fetched statement result
+    def result_columns(self):
+        return list(self._result_columns)
+
+    # set column names of fetched statement result served from cache
+    def set_result_columns(self, columns):
+        self._result_columns = tuple(columns)
+
+    # execute statement with retry policy for transient errors,
+    # uses session cursor or new streaming cursor if batch_size is
+    # set. returns the executed cursor
+    def _execute(self, sql, params, batch_size=None):
+        # route writes and transaction statements to sqlite writer
+        writer = self.dbh.writer
+        if writer and (self._writer_txn or not writer.is_read(sql)):
+            return self._execute_writer(sql, params)
+
+        policy = self.dbh.retry_policy
+        breaker = self.dbh.circuit_breaker
+
+        t_start = time.perf_counter()
+        attempt = 0
+        self._retries = 0
+        while True:
+            if breaker:
+                breaker.check()
+
+            if batch_size:
+                cur = self.dbh.engine.stream_cursor(self._conn, batch_size)
+            else:
+                cur = self._cur
+
             try:
                 if params:
-                    self._cur.execute(sql, tuple(params))
+                    cur.execute(sql, tuple(params))
                 else:
-                    self._cur.execute(sql)
-                return
-            except self.dbh.engine.DatabaseError as e:
-                err = str(e)
-                break
+                    cur.execute(sql)
+                if breaker:
+                    breaker.success()
+                self._retries = attempt
+                return cur
             except (RuntimeError, ValueError):
                 raise
             except Exception as e:
-                err = str(e)
-
-            time.sleep(self.dbh.options['retry_delay'])
-
-        raise RuntimeError(err)
+                if batch_size:
+                    self._close_cursor(cur)
+
+                kind = self.dbh.engine.classify_error(e)
+                if breaker:
+                    # backend answered with non connection error
+                    if kind == 'connection':
+                        breaker.failure()
+                    else:
+                        breaker.success()
+
+                retry = policy.should_retry(
+                    kind, attempt, self._in_transaction,
+                    busy_aborts_transaction=(
+                        self.dbh.engine.busy_aborts_transaction))
+                if retry:
+                    delay = policy.backoff(attempt)
+                    if policy.deadline > 0 and \
+                            time.perf_counter() - t_start + delay > \
+                            policy.deadline:
+                        retry = False
+
+                # clear failed implicit transaction before backoff,
+                # pgsql rejects further statements till rollback
+                if retry and kind != 'connection' and \
+                        not self._in_transaction:
+                    try:
+                        self._conn.rollback()
+                    except Exception:
+                        retry = False
+
+                if not retry:
+                    self._retries = attempt
+                    self._record(
+                        sql, time.perf_counter() - t_start, error=True)
+                    raise RuntimeError(str(e)) from e
+
+                if self.dbh.logger:
+                    self.dbh.logger.debug(
+                        "(%s) - retry %s after %s error: %s" % (
+                            self.dbh.options.get('database'),
+                            attempt + 1, kind, e))
+
+            time.sleep(delay)
+            attempt += 1
+
+            # drop broken connection and reconnect
+            if kind == 'connection':
+                self._reconnect()
+
+    # execute statement by writer thread and wait result
+    def _execute_writer(self, sql, params):
+        t_start = time.perf_counter()
+        self._retries = 0
+        if self._writer_txn:
+            future = self._writer_txn.execute(sql, params)
+        else:
+            future = self.dbh.writer.submit(sql, params)
+        try:
+            return self._wait_writer(future)
+        except Exception:
+            self._record(sql, time.perf_counter() - t_start, error=True)
+            raise
+
+    def _wait_writer(self, future):
+        try:
+            return future.result()
+        except (RuntimeError, ValueError):
+            raise
+        except Exception as e:
+            raise RuntimeError(str(e)) from e
+
+    # record statement statistics and log slow statements
+    def _record(self, sql, elapsed, rows=0, error=False):
+        stats = self.dbh.stmt_stats
+        if not stats:
+            return
+
+        stats.record(
+            sql, elapsed, rows=rows, retries=self._retries, error=error)
+        if self.dbh.logger and stats.is_slow(elapsed):
+            self.dbh.logger.warning(
+                "(%s) - slow query %.3fs:\n%s" % (
+                    self.dbh.options.get('database'), elapsed,
+                    re.sub('\n\\s+', '\n', sql).strip()))
+
+    def _reconnect(self):
+        conn, self._conn = self._conn, None
+        self._close_cursor(self._cur)
+        self._cur = None
+        self.dbh.release(conn, invalidate=True)
+        self.connect()
 
-    def fetchall(self, sql, params=None):
-        self.execute(sql, params=params)
-        return self._cur.fetchall()
+    def _close_cursor(self, cur):
+        try:
+            cur.close()
+        except Exception:
+            pass
 
     def rowsaffected(self):
-        if self._cur:
-            return self._cur.rowcount
+        if self._result:
+            return self._result.rowcount
         return 0
 
     def begin(self):
+        # commit deferred writes before explicit transaction
+        if self._deferred:
+            self.flush()
+
         if not self._in_transaction:
-            if self.dbh.engine.backend == 'mssql':
+            if self.dbh.writer:
+                self.connect()
+                self._writer_txn = self.dbh.writer.begin()
+            elif self.dbh.engine.backend == 'mssql':
                 self.execute("BEGIN TRAN;")
             else:
                 self.execute("BEGIN;")
@@ -109,18 +535,49 @@ class Session(object):
             self.dbh.logger.debug(
                 "(%s) - commit" % self.dbh.options.get('database'))
 
-        if self._in_transaction:
-            if self.dbh.engine.backend == 'mssql':
-                self.execute("COMMIT TRAN;")
+        self._deferred = False
+        self._pending_ops = 0
 
-        self._conn.commit()
-        self._in_transaction = False
+        if self._writer_txn:
+            txn, self._writer_txn = self._writer_txn, None
+            self._in_transaction = False
+            self._wait_writer(txn.commit())
+        else:
+            if self._in_transaction:
+                if self.dbh.engine.backend == 'mssql':
+                    self.execute("COMMIT TRAN;")
+
+            self._conn.commit()
+            self._in_transaction = False
+
+        # invalidate results cached by other sessions before commit
+        if self._written_tables:
+            if self.dbh.result_cache:
+                for table in self._written_tables:
+                    self.dbh.result_cache.invalidate(table)
+            self._written_tables = set()
 
     def rollback(self):
         if self.dbh.logger:
             self.dbh.logger.debug(
                 "(%s) - rollback" % self.dbh.options.get('database'))
 
+        self._deferred = False
+        self._pending_ops = 0
+
+        # invalidate results cached from rolled back writes
+        if self._written_tables:
+            if self.dbh.result_cache:
+                for table in self._written_tables:
+                    self.dbh.result_cache.invalidate(table)
+            self._written_tables = set()
+
+        if self._writer_txn:
+            txn, self._writer_txn = self._writer_txn, None
+            self._in_transaction = False
+            self._wait_writer(txn.rollback())
+            return
+
         if self._in_transaction:
             if self.dbh.engine.backend == 'mssql':
                 self.execute("ROLLBACK TRAN;")
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+import heapq
+import struct
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = []
+
+
+# stable 64-bit hash of shard key value
+def key_hash(value):
+    if isinstance(value, bytes):
+        data = value
+    else:
+        data = str(value).encode()
+    return struct.unpack('<Q', hashlib.md5(data).digest()[:8])[0]
+
+
+# jump consistent hash, maps key to bucket in [0, buckets) moving
+# only 1/n of keys when buckets count grows to n
+def jump_hash(key, buckets):
+    if buckets <= 0:
+        raise ValueError("invalid buckets count")
+
+    b, j = -1, 0
+    key = key & 0xFFFFFFFFFFFFFFFF
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+# sort key for merging rows on multiple ordering columns with mixed
+# directions, None values are ordered first in ascending order
+class _SortKey(object):
+
+    __slots__ = ('values', 'orders')
+
+    def __init__(self, values, orders):
+        self.values = values
+        self.orders = orders
+
+    def __lt__(self, other):
+        for a, b, desc in zip(self.values, other.values, self.orders):
+            if a == b:
+                continue
+            if a is None:
+                return not desc
+            if b is None:
+                return desc
+            return a > b if desc else a < b
+        return False
+
+
+# route model rows to shards by stable hash of shard key column.
+# shards are list of table names on dbh handler, DBHandler instances
+# using model table name or (DBHandler, table name) tuples.
+class ShardRouter(object):
+
+    def __init__(self, model, shards, key='guid', dbh=None, workers=0):
+        self.model = model
+        # shard key column
+        self.key = key
+
+        self.shards = []
+        for shard in shards:
+            if isinstance(shard, str):
+                if not dbh:
+                    raise ValueError("dbh required for tables shards")
+                self.shards.append((dbh, shard))
+            elif isinstance(shard, (tuple, list)):
+                self.shards.append((shard[0], shard[1]))
+            else:
+                self.shards.append((shard, model.table_name()))
+        if not self.shards:
+            raise ValueError("invalid empty shards list")
+
+        # max parallel scatter-gather workers
+        self.workers = int(workers) or len(self.shards)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    # get shard index for shard key value
+    def shard_index(self, value):
+        if value is None:
+            raise ValueError("invalid empty shard key")
+        return jump_hash(key_hash(value), len(self.shards))
+
+    # get (dbh, table name) for shard key value
+    def shard(self, value):
+        return self.shards[self.shard_index(value)]
+
+    # get session for key based operations
+    def session(self):
+        return ShardSession(self)
+
+    # get scatter-gather query over all shards
+    def query(self):
+        return ShardQuery(self)
+
+    # create shards tables
+    def init_database(self, **kwargs):
+        for dbh, table in self.shards:
+            dbh.init_database([self.model], table_name=table, **kwargs)
+
+    # run func(dbh, table) for all shards in parallel, each call
+    # uses its own session. returns results in shards order
+    def scatter(self, func):
+        with self._lock:
+            if not self._executor:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="shard")
+            executor = self._executor
+
+        futures = [executor.submit(func, dbh, table)
+                   for dbh, table in self.shards]
+        return [f.result() for f in futures]
+
+    # shutdown scatter-gather workers
+    def close(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+# session for key routed operations, opens one session per shard
+# handler on demand. shard writes are not atomic across handlers.
+class ShardSession(object):
+
+    def __init__(self, router):
+        self.router = router
+        self._sessions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # get query on shard of key value
+    def __call__(self, value):
+        dbh, table = self.router.shard(value)
+        return self.router.model(self.session(value), table_name=table)
+
+    # get session of shard handler for key value
+    def session(self, value):
+        dbh, _ = self.router.shard(value)
+        if id(dbh) not in self._sessions:
+            self._sessions[id(dbh)] = dbh.session()
+        return self._sessions[id(dbh)]
+
+    def close(self):
+        sessions, self._sessions = self._sessions, {}
+        err = None
+        for dbs in sessions.values():
+            try:
+                dbs.close()
+            except Exception as e:
+                err = err or e
+        if err:
+            raise err
+
+    # insert element to shard of its key value, returns guid
+    def insert(self, data):
+        data = self._with_guid(data)
+        return self(data.get(self.router.key)).insert(data)
+
+    # insert elements grouped by shard, returns guids in input order
+    def insert_many(self, data_list, chunk_size=500):
+        groups = {}
+        guids = []
+        for data in data_list:
+            data = self._with_guid(data)
+            idx = self.router.shard_index(data.get(self.router.key))
+            groups.setdefault(idx, []).append(data)
+            guids.append(data['guid'])
+
+        for idx, chunk in groups.items():
+            dbh, table = self.router.shards[idx]
+            value = chunk[0].get(self.router.key)
+            self.router.model(self.session(value), table_name=table) \
+                .insert_many(chunk, chunk_size=chunk_size)
+        return guids
+
+    # guid is generated before routing when used as shard key
+    def _with_guid(self, data):
+        if type(data) is not dict:
+            raise ValueError("invalid data type")
+        if 'guid' not in data:
+            data = dict(
+                data, guid=self.router.model.guid_generator()(1)[0])
+        return data
+
+
+# scatter-gather query over all shards, builder calls are replayed on
+# each shard query and results are merged honoring ordering, limit
+# and offset
+class ShardQuery(object):
+
+    def __init__(self, router):
+        self.router = router
+        self._calls = []
+        self._limit = 0
+        self._offset = 0
+
+    def columns(self, *columns):
+        self._calls.append(('columns', columns))
+        return self
+
+    def filter(self, expr, *params):
+        self._calls.append(('filter', (expr,) + params))
+        return self
+
+    def filterby(self, column, value):
+        self._calls.append(('filterby', (column, value)))
+        return self
+
+    def orderby(self, *orderby):
+        self._calls.append(('orderby', orderby))
+        return self
+
+    def rowmode(self, mode):
+        self._calls.append(('rowmode', (mode,)))
+        return self
+
+    def cache(self, enabled=True, ttl=None):
+        self._calls.append(('cache', (enabled, ttl)))
+        return self
+
+    def primary(self):
+        self._calls.append(('primary', ()))
+        return self
+
+    def limit(self, limit):
+        self._limit = int(limit)
+        return self
+
+    def offset(self, offset):
+        self._offset = int(offset)
+        return self
+
+    # return merged elements of all shards
+    def all(self):
+        # each shard returns up to offset+limit rows
+        limit = self._offset + self._limit if self._limit > 0 else 0
+
+        def fetch(dbh, table):
+            with dbh.session() as dbs:
+                qry = self._build(dbs, table)
+                if limit:
+                    qry.limit(limit)
+                rows = qry.all()
+                return rows, qry._orderby, dbs.result_columns()
+
+        results = self.router.scatter(fetch)
+        orderby = results[0][1]
+        if orderby:
+            keys = [v.split(" ") for v in orderby]
+            orders = [k[1] == 'DESC' for k in keys]
+            streams = []
+            for rows, _, columns in results:
+                streams.append(self._keyed(rows, columns, keys, orders))
+            merged = (r for _, _, r in heapq.merge(*streams))
+        else:
+            merged = (r for rows, _, _ in results for r in rows)
+
+        result = []
+        for i, row in enumerate(merged):
+            if i < self._offset:
+                continue
+            if limit and i >= limit:
+                break
+            result.append(row)
+        return result
+
+    # return first element by ordering or None
+    def first(self):
+        self._limit, self._offset = 1, 0
+        result = self.all()
+        if result:
+            return result[0]
+        return None
+
+    # return total count of all shards
+    def count(self):
+        def fetch(dbh, table):
+            with dbh.session() as dbs:
+                return self._build(dbs, table).count()
+
+        return sum(self.router.scatter(fetch))
+
+    def _build(self, dbs, table):
+        qry = self.router.model(dbs, table_name=table)
+        for name, args in self._calls:
+            getattr(qry, name)(*args)
+        return qry
+
+    # yield (sort key, seq, row) for rows stream
+    def _keyed(self, rows, columns, keys, orders):
+        if rows and not hasattr(rows[0], 'keys'):
+            idx = [columns.index(k[0]) for k in keys]
+        else:
+            idx = [k[0] for k in keys]
+        for seq, row in enumerate(rows):
+            yield _SortKey([row[i] for i in idx], orders), seq, row
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import re
+import math
+import threading
+import functools
+from collections import OrderedDict, deque
+
+__all__ = []
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_PARAMS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SQL_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SQL_SPACES = re.compile(r"\s+")
+
+
+# get statement shape with literals and params lists collapsed
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    sql = _SQL_STRING.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _SQL_NUMBER.sub('?', sql)
+    sql = _SQL_PARAMS.sub('(...)', sql)
+    sql = _SQL_ROWS.sub('(...)', sql)
+    return _SQL_SPACES.sub(' ', sql).strip()
+
+
+# thread safe per statement shape execution statistics
+class StatementStats(object):
+
+    def __init__(self, size=1000, samples=1024, slow_threshold=0):
+        # max number of tracked statement shapes
+        self.size = int(size)
+        # latency samples kept per statement for percentiles
+        self.samples = int(samples)
+        # min statement seconds to log as slow query, 0 to disable
+        self.slow_threshold = float(slow_threshold)
+
+        # statement shape: [count, errors, retries, rows, slow,
+        #                   total_time, max_time, latencies]
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    # record executed statement, elapsed time in seconds
+    def record(self, sql, elapsed, rows=0, retries=0, error=False):
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                entry = [0, 0, 0, 0, 0, 0.0, 0.0,
+                         deque(maxlen=self.samples)]
+                self._data[key] = entry
+                while len(self._data) > self.size:
+                    self._data.popitem(last=False)
+            else:
+                self._data.move_to_end(key)
+
+            entry[0] += 1
+            if error:
+                entry[1] += 1
+            entry[2] += retries
+            if rows > 0:
+                entry[3] += rows
+            if self.is_slow(elapsed):
+                entry[4] += 1
+            entry[5] += elapsed
+            if elapsed > entry[6]:
+                entry[6] = elapsed
+            entry[7].append(elapsed)
+
+    # check if elapsed seconds exceed slow query threshold
+    def is_slow(self, elapsed):
+        return self.slow_threshold > 0 and elapsed >= self.slow_threshold
+
+    # get statistics snapshot per statement shape, optionally
+    # resetting statistics in same step
+    def snapshot(self, reset=False):
+        with self._lock:
+            data = [(k, v[:7] + [sorted(v[7])])
+                    for k, v in self._data.items()]
+            if reset:
+                self._data = OrderedDict()
+
+        result = {}
+        for key, (count, errors, retries, rows, slow, total,
+                  max_time, latencies) in data:
+            result[key] = {
+                'count': count,
+                'errors': errors,
+                'retries': retries,
+                'rows': rows,
+                'slow': slow,
+                'total_time': total,
+                'avg_time': total / count if count else 0,
+                'max_time': max_time,
+                'p50': self._percentile(latencies, 50),
+                'p95': self._percentile(latencies, 95),
+                'p99': self._percentile(latencies, 99),
+            }
+        return result
+
+    # delete all statistics
+    def reset(self):
+        with self._lock:
+            self._data = OrderedDict()
+
+    # nearest-rank percentile of sorted values
+    def _percentile(self, values, pct):
+        if not values:
+            return 0
+        idx = int(math.ceil(pct / 100.0 * len(values))) - 1
+        return values[max(0, idx)]